@@ -1,14 +1,19 @@
 import streamlit as st
-import pandas as pd
 import speech_recognition as sr
 import sounddevice as sd
-import numpy as np
 import datetime
-import wavio
 import os
+import time
+import uuid
+import pandas as pd
+from resources import aggregates as _aggregates, guest_index as _guest_index, rooms as _rooms
+from rooms import ROOM_TYPES
+from pricing import DISCOUNT_OPTIONS, ROOM_RATES, price_stay
+from voice import VoicePipeline
+from recognizers import BACKENDS, make_recognizer
+from perf import TIMINGS, span
 
-# File to store user data
-csv_file = "/Users/adityahemantshahane/Desktop/codes/user_data.csv"
+run_started = time.perf_counter()
 
 # Initialize session state for discount selection
 if "selected_discount" not in st.session_state:
@@ -16,30 +21,80 @@ if "selected_discount" not in st.session_state:
 if "user_data" not in st.session_state:
     st.session_state.user_data = {}
 
-# Function to record and transcribe speech
-def record_audio(filename="output.wav", duration=5, samplerate=44100):
-    st.write("🎙️ Recording... Speak now!")
-    audio_data = sd.rec(int(duration * samplerate), samplerate=samplerate, channels=1, dtype=np.int16)
-    progress_bar = st.progress(0)
-    for i in range(100):
-        progress_bar.progress(i + 1)
-        sd.sleep(int(duration * 10))
-    sd.wait()
-    wavio.write(filename, audio_data, samplerate, sampwidth=2)
-    st.write("✅ Recording Complete!")
-    recognizer = sr.Recognizer()
-    with sr.AudioFile(filename) as source:
-        audio = recognizer.record(source)
-    try:
-        text = recognizer.recognize_google(audio)
-        st.success(f"Recognized Name: {text}")
-        return text
-    except sr.UnknownValueError:
-        st.error("Could not understand the audio.")
-        return ""
-    except sr.RequestError:
-        st.error("Speech recognition service is unavailable.")
-        return ""
+if "pending_voice" not in st.session_state:
+    st.session_state.pending_voice = {}
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex[:8]
+
+# One mic thread + recognizer pool for the whole process
+@st.cache_resource(show_spinner=False)
+def _voice():
+    return VoicePipeline()
+
+# Speech backends are built once per process; the offline model stays warm
+@st.cache_resource(show_spinner=False)
+def _loaded_backends():
+    return {}
+
+@st.cache_resource(show_spinner="Loading speech model...")
+def _recognizer(name):
+    _loaded_backends()[name] = make_recognizer(name)
+    return _loaded_backends()[name]
+
+backend_names = list(BACKENDS)
+default_backend = os.environ.get("OCEANO_SPEECH_BACKEND", "google")
+speech_backend = st.sidebar.selectbox(
+    "Speech recognizer", backend_names,
+    # an unknown name in the env var falls back to the first backend
+    index=backend_names.index(default_backend) if default_backend in backend_names else 0,
+)
+try:
+    recognizer = _recognizer(speech_backend)
+except Exception as e:
+    st.sidebar.error(f"{speech_backend} unavailable: {e}")
+    recognizer = _recognizer("google")
+
+# Function to record and transcribe speech (returns immediately)
+def record_audio(field):
+    st.session_state.pending_voice[field] = _voice().submit(
+        field, st.session_state.session_id, recognize=recognizer
+    )
+    st.rerun()  # restart so the status fragment starts polling
+
+# Copy finished transcriptions into the form before the widgets are drawn
+def collect_transcripts():
+    for field, future in list(st.session_state.pending_voice.items()):
+        if not future.done():
+            continue
+        del st.session_state.pending_voice[field]
+        try:
+            text = future.result()
+            st.session_state.user_data[field] = text
+            st.success(f"Recognized {field}: {text}")
+        except sr.UnknownValueError:
+            st.error(f"Could not understand the audio for {field}.")
+        except sr.RequestError:
+            st.error("Speech recognition service is unavailable.")
+        except sd.PortAudioError as e:
+            st.error(f"Microphone error: {e}")
+
+# Poll pending recordings without blocking the rest of the page
+@st.fragment(run_every=1 if st.session_state.pending_voice else None)
+def voice_status():
+    pending = st.session_state.pending_voice
+    if any(f.done() for f in pending.values()):
+        st.rerun()
+    if pending:
+        st.info(f"🎙️ Speak now! Listening / transcribing: {', '.join(pending)}")
+
+collect_transcripts()
+
+# Per-backend recognition latency, for comparing cloud vs offline
+with st.sidebar.expander("⏱️ Recognition latency"):
+    for name, backend in _loaded_backends().items():
+        stats = backend.latency.summary()
+        if stats["calls"]:
+            st.write(f"**{name}** · {stats['calls']} calls · p50 {stats['p50_ms']} ms · p95 {stats['p95_ms']} ms")
 
 # Streamlit UI
 st.title("🍽️ Welcome to Oceano Retreat")
@@ -48,21 +103,11 @@ st.subheader("Fill in your details:")
 # Show Date & Time
 current_datetime = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 st.write(f"📅 Date & Time: {current_datetime}")
-
-# Load existing data
-if os.path.exists(csv_file):
-    existing_df = pd.read_csv(csv_file)
-else:
-    existing_df = pd.DataFrame(columns=["Date & Time", "Name", "Discount Applied", "Mobile Number", "Aadhar Card Number", "Age", "Nationality", "Address", "Check-in Date", "Check-out Date", "Room Number", "Room Type", "Room Rent", "Total Stay", "Total Bill"])
-
-# Ensure necessary columns exist
-for col in ["Date & Time", "Name", "Discount Applied", "Mobile Number", "Aadhar Card Number", "Age", "Nationality", "Address", "Check-in Date", "Check-out Date", "Room Number", "Room Type", "Room Rent", "Total Stay", "Total Bill"]:
-    if col not in existing_df.columns:
-        existing_df[col] = ""
+voice_status()
 
 # Special Offers (Discount Selection First)
 st.subheader("🎉 Special Offers")
-discount_options = ["5% Discount", "10% Discount", "15% Discount", "Free Drink", "Free Dessert", "VIP Lounge Access"]
+discount_options = DISCOUNT_OPTIONS
 st.session_state.selected_discount = st.radio("Select your reward:", discount_options, index=discount_options.index(st.session_state.selected_discount) if st.session_state.selected_discount in discount_options else 0)
 st.write(f"✅ Selected Discount: **{st.session_state.selected_discount}**")
 st.session_state.user_data["Discount Applied"] = st.session_state.selected_discount
@@ -73,12 +118,27 @@ if st.button("Save Special Offer"):
 st.session_state.user_data["Date & Time"] = current_datetime
 
 with st.expander("👤 Personal Details"):
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        lookup = st.text_input("🔎 Returning guest? Mobile or Aadhar number")
+    with col2:
+        if st.button("Autofill") and lookup:
+            with span("lookup"):
+                index = _guest_index()
+                index.refresh()  # pick up other terminals' saves
+                found = index.lookup(lookup)
+            if found:
+                st.session_state.user_data.update(found)
+                st.success(f"Welcome back, {found['Name']}!")
+            else:
+                st.info("No previous stay found.")
+
     col1, col2 = st.columns([2, 1])
     with col1:
         st.session_state.user_data["Name"] = st.text_input("Enter Name", value=st.session_state.user_data.get("Name", ""))
     with col2:
         if st.button("🎤 Speak Name"):
-            st.session_state.user_data["Name"] = record_audio()
+            record_audio("Name")
     
     fields = ["Mobile Number", "Aadhar Card Number", "Age", "Nationality", "Address"]
     for field in fields:
@@ -87,7 +147,7 @@ with st.expander("👤 Personal Details"):
             st.session_state.user_data[field] = st.text_input(field, value=st.session_state.user_data.get(field, ""))
         with col2:
             if st.button(f"🎤 Speak {field}"):
-                st.session_state.user_data[field] = record_audio()
+                record_audio(field)
     if st.button("Save Personal Details"):
         st.success("Personal details saved!")
 
@@ -95,28 +155,55 @@ with st.expander("🏨 Stay Details"):
     col1, col2 = st.columns(2)
     with col1:
         st.session_state.user_data["Check-in Date"] = st.date_input("Check-in Date", value=st.session_state.user_data.get("Check-in Date", datetime.date.today()))
-        st.session_state.user_data["Room Number"] = st.text_input("Room Number", value=st.session_state.user_data.get("Room Number", ""))
+        st.session_state.user_data["Room Type"] = st.selectbox("Room Type", ROOM_TYPES, index=ROOM_TYPES.index(st.session_state.user_data.get("Room Type", "Single")))
     with col2:
         st.session_state.user_data["Check-out Date"] = st.date_input("Check-out Date", value=st.session_state.user_data.get("Check-out Date", datetime.date.today()))
-        st.session_state.user_data["Room Type"] = st.selectbox("Room Type", ["Single", "Double", "Suite"], index=["Single", "Double", "Suite"].index(st.session_state.user_data.get("Room Type", "Single")))
+        with span("rooms.free"):
+            rooms = _rooms()
+            rooms.refresh()
+            free = rooms.free_rooms(st.session_state.user_data["Room Type"], st.session_state.user_data["Check-in Date"], st.session_state.user_data["Check-out Date"])
+        current = st.session_state.user_data.get("Room Number", "")
+        if free:
+            st.session_state.user_data["Room Number"] = st.selectbox(f"Room Number ({len(free)} free)", free, index=free.index(current) if current in free else 0)
+        else:
+            st.session_state.user_data["Room Number"] = ""
+            st.warning(f"No {st.session_state.user_data['Room Type']} rooms free for these dates.")
     
-    st.session_state.user_data["Room Rent"] = st.number_input("Room Rent (per night)", min_value=0.0, step=0.1, value=st.session_state.user_data.get("Room Rent", 0.0))
-    st.session_state.user_data["Total Stay"] = (st.session_state.user_data["Check-out Date"] - st.session_state.user_data["Check-in Date"]).days
-    discount_factor = {"5% Discount": 0.95, "10% Discount": 0.90, "15% Discount": 0.85}.get(st.session_state.selected_discount, 1.0)
-    st.session_state.user_data["Total Bill"] = st.session_state.user_data["Total Stay"] * st.session_state.user_data["Room Rent"] * discount_factor
+    room_type = st.session_state.user_data["Room Type"]
+    rent = st.number_input("Room Rent (per night)", min_value=0.0, step=0.1, value=ROOM_RATES[room_type], key=f"rent_{room_type}")
+    st.session_state.user_data.update(price_stay(st.session_state.user_data["Check-in Date"], st.session_state.user_data["Check-out Date"], room_type, st.session_state.selected_discount, rent))
     
     st.write(f"📌 Total Stay Duration: {st.session_state.user_data['Total Stay']} nights")
-    st.write(f"💰 Final Bill after Discount: ₹{st.session_state.user_data['Total Bill']}")
+    st.write(f"💰 Final Bill after Discount: ₹{st.session_state.user_data['Total Bill']:.2f}")
     if st.button("Save Stay Details"):
         st.success("Stay details saved!")
 
 # Save to CSV
 if st.button("Save All Details"):
-    df = pd.DataFrame([st.session_state.user_data])
-    if os.path.exists(csv_file):
-        existing_df = pd.read_csv(csv_file)
-    df = pd.concat([existing_df, df], ignore_index=True)
-    df.to_csv(csv_file, index=False)
-    st.success(f"✅ Details saved successfully! {st.session_state.user_data['Discount Applied']} applied.")
-
-st.write("📂 Your details will be securely stored in `user_data.csv`.")
\ No newline at end of file
+    room = st.session_state.user_data["Room Number"]
+    if not room:
+        st.error("❌ No room selected – none of this type is free for these dates.")
+    elif st.session_state.user_data["Check-out Date"] <= st.session_state.user_data["Check-in Date"]:
+        st.error("❌ Check-out must be at least one night after check-in.")
+    else:
+        with span("save"):
+            # Clash check and append happen under the ledger lock, so two terminals can't take the same room
+            saved = _rooms().reserve(st.session_state.user_data)
+            if saved:
+                _guest_index().refresh()
+                _aggregates().refresh()
+                _rooms().refresh()
+        if saved:
+            st.success(f"✅ Details saved successfully! {st.session_state.user_data['Discount Applied']} applied.")
+        else:
+            st.error(f"❌ Room {room} is already booked for these dates.")
+
+st.write("📂 Your details will be securely stored in `user_data.csv`.")
+
+# Where this terminal's time goes (spans from perf.py), for troubleshooting
+if st.sidebar.checkbox("Debug timings", value=bool(os.environ.get("OCEANO_DEBUG"))):
+    with st.sidebar.expander("🐢 Debug timings", expanded=True):
+        st.dataframe(TIMINGS.summary())
+        st.caption("Latest spans")
+        st.dataframe(pd.DataFrame(TIMINGS.recent(limit=20)[::-1]))
+TIMINGS.record("rerun", time.perf_counter() - run_started, app="UserInterface")
\ No newline at end of file
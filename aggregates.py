@@ -0,0 +1,105 @@
+"""Materialized occupancy / revenue aggregates for the reports page.
+
+Instead of grouping the full ledger on every rerun, each saved stay is
+folded into small running totals once:
+
+* per night and room type: rooms occupied and revenue earned that night
+  (the bill spread evenly over the nights of the stay),
+* per room type: stays, room-nights and revenue,
+* per offer: stays and revenue.
+
+The totals follow the ledger with `read_since`, like the guest index, and
+are persisted to `user_data.aggregates.json`. Their size grows with the
+number of days, not the number of guests.
+"""
+
+import datetime
+import threading
+
+import pandas as pd
+
+from ledger import read_json, sidecar_path, write_json
+from perf import span
+from rooms import day_number
+
+
+def _amount(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class StayAggregates:
+
+    def __init__(self, ledger, path=None):
+        self.ledger = ledger
+        self.path = path or sidecar_path(ledger.path, "aggregates.json")
+        self._lock = threading.Lock()
+        state = read_json(self.path) or {}
+        if state.get("generation") == ledger.generation():
+            self.state = state
+        else:
+            self._reset()
+        self.refresh()
+
+    def _reset(self):
+        self.state = {
+            "generation": self.ledger.generation(), "offset": 0,
+            "daily": {}, "by_room_type": {}, "by_discount": {},
+        }
+        for row in self.ledger.read_archived():  # history moved aside by `rotate`
+            self._apply(row)
+
+    def _apply(self, row):
+        room_type = row.get("Room Type") or "Unknown"
+        discount = row.get("Discount Applied") or "None"
+        bill = _amount(row.get("Total Bill"))
+        start, end = day_number(row.get("Check-in Date")), day_number(row.get("Check-out Date"))
+        nights = end - start if start is not None and end is not None and end > start else 0
+
+        t = self.state["by_room_type"].setdefault(room_type, [0, 0, 0.0])
+        t[0], t[1], t[2] = t[0] + 1, t[1] + nights, t[2] + bill
+        d = self.state["by_discount"].setdefault(discount, [0, 0.0])
+        d[0], d[1] = d[0] + 1, d[1] + bill
+        for n in range(nights):
+            key = datetime.date.fromordinal(start + n).isoformat()
+            cell = self.state["daily"].setdefault(key, {}).setdefault(room_type, [0, 0.0])
+            cell[0], cell[1] = cell[0] + 1, cell[1] + bill / nights
+
+    def refresh(self):
+        """Fold in stays saved since the last call (by any terminal)."""
+        with self._lock, span("aggregates.refresh"):
+            if self.ledger.generation() != self.state["generation"]:  # compacted / rotated
+                self._reset()
+            rows, offset = self.ledger.read_since(self.state["offset"])
+            for row in rows:
+                self._apply(row)
+            self.state["offset"] = offset
+            if rows:
+                write_json(self.path, self.state)
+            return len(rows)
+
+    # ── views for the reports page ──────────────────────────────────────────
+
+    def daily(self, start, end):
+        """Long frame: Date, Room Type, Rooms, Revenue for nights in [start, end)."""
+        lo, hi = start.isoformat(), end.isoformat()
+        records = [
+            (day, room_type, rooms, revenue)
+            for day, types in self.state["daily"].items() if lo <= day < hi
+            for room_type, (rooms, revenue) in types.items()
+        ]
+        df = pd.DataFrame(records, columns=["Date", "Room Type", "Rooms", "Revenue"])
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df.sort_values("Date")
+
+    def by_room_type(self):
+        df = pd.DataFrame.from_dict(self.state["by_room_type"], orient="index",
+                                    columns=["Stays", "Room Nights", "Revenue"])
+        df["ADR"] = df["Revenue"] / df["Room Nights"].where(df["Room Nights"] > 0)
+        return df.rename_axis("Room Type")
+
+    def by_discount(self):
+        return pd.DataFrame.from_dict(self.state["by_discount"], orient="index",
+                                      columns=["Stays", "Revenue"]).rename_axis("Offer")
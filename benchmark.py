@@ -0,0 +1,264 @@
+"""Offline benchmarks for the registration flow.
+
+Run `python benchmark.py <suite>`; every suite uses synthetic data only,
+so no microphone, network or Google account is needed.
+
+    vad       fixed 5 s capture vs endpointed + 16 kHz capture
+    pricing   vectorized re-bill of N stays, checked against price_stay
+    save      full save path (ledger, index, aggregates, rooms, outbox,
+              sheet push to a FakeWorksheet) on ledgers of each --sizes
+    lookup    returning-guest and free-room lookups on the same ledgers
+
+`save` and `lookup` report per-step p50 / p95 from the perf spans and how
+much slower the largest ledger is than the smallest; `--max-growth` turns
+that ratio into a pass / fail check.
+"""
+
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 1 · SYNTHETIC DATA
+# ─────────────────────────────────────────────────────────────────────────────
+
+def synthetic_utterance(speech_s, lead_s=0.4, total_s=5.0, samplerate=44100, seed=0):
+    """Room noise with a voiced, amplitude-modulated 'utterance' in it."""
+    rng = np.random.default_rng(seed)
+    x = rng.normal(0, 60, int(total_s * samplerate))
+    t = np.arange(int(speech_s * samplerate)) / samplerate
+    envelope = 0.4 + 0.6 * np.abs(np.sin(2 * np.pi * 3 * t))
+    voice = envelope * (3000 * np.sin(2 * np.pi * 180 * t) + 1500 * np.sin(2 * np.pi * 360 * t))
+    start = int(lead_s * samplerate)
+    x[start:start + len(voice)] += voice
+    return np.clip(x, -32768, 32767).astype(np.int16).reshape(-1, 1)
+
+
+def synthetic_stays(n, seed=0):
+    """Ledger-shaped stays spread over three years."""
+    from pricing import DISCOUNT_OPTIONS
+    from rooms import ROOM_TYPES
+
+    rng = np.random.default_rng(seed)
+    p = rng.random(n)
+    check_in = np.datetime64("2023-01-01") + rng.integers(0, 3 * 365, n).astype("timedelta64[D]")
+    check_out = check_in + rng.integers(0, 15, n).astype("timedelta64[D]")
+    return pd.DataFrame({
+        "Check-in Date": check_in.astype(str),
+        "Check-out Date": check_out.astype(str),
+        "Room Type": rng.choice(ROOM_TYPES, n),
+        # Mostly the type rate (NaN), some desk rates, a few complimentary stays
+        "Room Rent": np.select([p < 0.05, p < 0.25], [0, rng.integers(800, 4000, n)], np.nan),
+        "Discount Applied": rng.choice(DISCOUNT_OPTIONS + [""], n),
+    })
+
+
+def synthetic_guests(n, seed=0):
+    """Raw guest rows as the bulk importer would read them."""
+    rng = np.random.default_rng(seed)
+    df = synthetic_stays(n, seed)
+    df["Room Rent"] = df["Room Rent"].astype(object).where(df["Room Rent"].notna(), "").astype(str)
+    df["Name"] = [f"Guest {seed}-{i}" for i in range(n)]
+    df["Mobile Number"] = rng.integers(7_000_000_000, 9_999_999_999, n).astype(str)
+    df["Aadhar Card Number"] = rng.integers(10 ** 11, 10 ** 12, n).astype(str)
+    df["Age"] = rng.integers(18, 80, n).astype(str)
+    df["Nationality"] = "Indian"
+    df["Address"] = "Goa"
+    df["Room Number"] = rng.integers(101, 111, n).astype(str)
+    df["Room Type"] = "Single"
+    return df
+
+
+@contextlib.contextmanager
+def synthetic_ledger(n, seed=0):
+    """Temporary `user_data.csv` holding `n` normalized guest rows."""
+    from bulk import normalize
+    from ledger import GuestLedger
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = GuestLedger(os.path.join(tmp, "user_data.csv"))
+        for start in range(0, n, 50_000):
+            clean, _ = normalize(synthetic_guests(min(50_000, n - start), seed + start))
+            ledger.append_many(clean.to_dict("records"))
+        yield ledger
+
+
+def _sizes(args):
+    return [int(s) for s in args.sizes.split(",")]
+
+
+def _growth(args, name, by_size):
+    """Print (and optionally enforce) largest-vs-smallest slowdown."""
+    small, large = min(by_size), max(by_size)
+    growth = by_size[large] / max(by_size[small], 1e-9)
+    print(f"{name}: {large:,} rows is {growth:.1f}× the cost at {small:,} rows")
+    if args.max_growth and growth > args.max_growth:
+        raise SystemExit(f"{name} grew {growth:.1f}× (limit {args.max_growth}×)")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 2 · SUITES
+# ─────────────────────────────────────────────────────────────────────────────
+
+def bench_vad(args):
+    from vad import TARGET_RATE, Endpointer, resample
+
+    samplerate, duration, block = 44100, 5.0, 1323
+    fixed_bytes = int(duration * samplerate) * 2
+    print(f"{'speech':>7} {'capture':>9} {'payload':>11} {'vs fixed':>9} {'cpu/clip':>9}")
+    for speech_s in (0.6, 1.0, 2.0, 3.5):
+        clip = synthetic_utterance(speech_s, samplerate=samplerate)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            ep = Endpointer(samplerate, max_seconds=duration)
+            for i in range(0, len(clip), block):
+                if ep.feed(clip[i:i + block]):
+                    break
+            out = resample(ep.speech(), samplerate, TARGET_RATE)
+        cpu = (time.perf_counter() - start) / args.repeat
+        print(f"{speech_s:>6.1f}s {ep.seconds:>8.2f}s {out.nbytes:>9,} B "
+              f"{out.nbytes / fixed_bytes:>8.1%} {cpu * 1000:>7.1f}ms")
+    print(f"fixed mode: {duration:.2f}s capture, {fixed_bytes:,} B payload per field")
+
+
+def bench_pricing(args):
+    from pricing import price_frame, price_stay
+
+    stays = synthetic_stays(args.rows)
+    start = time.perf_counter()
+    priced = price_frame(stays)
+    elapsed = time.perf_counter() - start
+    print(f"price_frame: {args.rows:,} stays in {elapsed:.2f}s "
+          f"({args.rows / elapsed:,.0f} stays/s)")
+
+    sample = stays.sample(min(args.sample, args.rows), random_state=0)
+    start = time.perf_counter()
+    single = np.array([
+        price_stay(r["Check-in Date"], r["Check-out Date"], r["Room Type"],
+                   r["Discount Applied"], r["Room Rent"])["Total Bill"]
+        for _, r in sample.iterrows()
+    ])
+    per_row = (time.perf_counter() - start) / len(sample)
+    diff = np.abs(single - priced.loc[sample.index, "Total Bill"].to_numpy()).max()
+    print(f"price_stay:  {per_row * 1e6:.0f} µs/stay "
+          f"(≈{per_row * args.rows:.0f}s for all {args.rows:,} one by one)")
+    print(f"max |single − vectorized| over {len(sample):,} sampled stays: ₹{diff:.2e}")
+    if diff > 1e-6:
+        raise SystemExit("pricing mismatch between price_stay and price_frame")
+
+
+def bench_save(args):
+    from aggregates import StayAggregates
+    from bulk import normalize
+    from guest_index import GuestIndex
+    from perf import TIMINGS, span
+    from rooms import RoomAvailability
+    from sheets_sync import SHEET_COLUMNS, FakeWorksheet, Outbox, SheetSyncWorker
+
+    steps = ["ledger.append", "index.refresh", "aggregates.refresh", "rooms.refresh",
+             "outbox.put", "sheets.append_rows"]
+    print(f"{'rows':>8} {'save p50':>9} {'p95':>7}  "
+          + " ".join(f"{s.split('.')[0]:>10}" for s in steps) + f" {'rewrite':>9}")
+    p50 = {}
+    for n in _sizes(args):
+        with synthetic_ledger(n) as ledger:
+            index, aggregates, rooms = GuestIndex(ledger), StayAggregates(ledger), RoomAvailability(ledger)
+            ws = FakeWorksheet([SHEET_COLUMNS], latency=args.latency)
+            worker = SheetSyncWorker(Outbox(ledger.path + ".outbox.jsonl"), lambda: ws)
+            new, _ = normalize(synthetic_guests(args.ops, seed=n + 1))
+            TIMINGS.clear()
+            for row in new.to_dict("records"):
+                with span("save"):
+                    ledger.append(row)
+                    index.refresh()
+                    aggregates.refresh()
+                    rooms.refresh()
+                    with span("outbox.put"):
+                        worker.outbox.put([row[c] for c in SHEET_COLUMNS])
+                worker.flush_once()  # the background thread's share
+            # What the old read-everything-and-rewrite save cost at this size
+            with span("legacy.rewrite"):
+                df = pd.read_csv(ledger.path)
+                pd.concat([df, new.head(1)]).to_csv(ledger.path + ".rewrite", index=False)
+            stats = TIMINGS.summary()
+        p50[n] = stats.loc["save", "p50_ms"]
+        print(f"{n:>8,} {p50[n]:>7.2f}ms {stats.loc['save', 'p95_ms']:>5.1f}ms  "
+              + " ".join(f"{stats.loc[s, 'p50_ms']:>8.2f}ms" for s in steps)
+              + f" {stats.loc['legacy.rewrite', 'p50_ms']:>7.0f}ms")
+    _growth(args, "save p50", p50)
+
+
+def bench_lookup(args):
+    from guest_index import GuestIndex
+    from perf import TIMINGS, span
+    from rooms import ROOM_TYPES, RoomAvailability
+
+    print(f"{'rows':>8} {'index build':>12} {'reload':>8} {'lookup':>9} "
+          f"{'free rooms':>11} {'pandas scan':>12}")
+    per_lookup = {}
+    for n in _sizes(args):
+        with synthetic_ledger(n) as ledger:
+            TIMINGS.clear()
+            with span("index.build"):
+                GuestIndex(ledger).save()
+            with span("index.reload"):
+                index = GuestIndex(ledger)
+            rooms = RoomAvailability(ledger)
+
+            df = ledger.read()
+            rng = np.random.default_rng(n)
+            numbers = df["Mobile Number"].astype(str).to_numpy()[rng.integers(0, len(df), args.ops)]
+            start = time.perf_counter()
+            hits = sum(index.lookup(x) is not None for x in numbers)
+            per_lookup[n] = (time.perf_counter() - start) / args.ops
+            if hits != args.ops:
+                raise SystemExit(f"guest index missed {args.ops - hits} known guests")
+
+            days = np.datetime64("2023-01-01") + rng.integers(0, 3 * 365, args.ops)
+            start = time.perf_counter()
+            for d in days.astype("datetime64[D]").astype(object):
+                rooms.free_rooms(ROOM_TYPES[0], d, d + np.timedelta64(3, "D").astype(object))
+            per_free = (time.perf_counter() - start) / args.ops
+
+            # The linear search the index replaced, for comparison
+            start = time.perf_counter()
+            for x in numbers[:20]:
+                df[df["Mobile Number"].astype(str) == x].tail(1)
+            per_scan = (time.perf_counter() - start) / min(20, len(numbers))
+            stats = TIMINGS.summary()
+        print(f"{n:>8,} {stats.loc['index.build', 'last_ms']:>10.0f}ms "
+              f"{stats.loc['index.reload', 'last_ms']:>6.0f}ms {per_lookup[n] * 1e6:>7.1f}µs "
+              f"{per_free * 1e6:>9.1f}µs {per_scan * 1e3:>10.2f}ms")
+    _growth(args, "lookup", per_lookup)
+
+
+SUITES = {"vad": bench_vad, "pricing": bench_pricing, "save": bench_save, "lookup": bench_lookup}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suite", choices=sorted(SUITES) + ["all"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=5_000)
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="ledger sizes for the save / lookup suites")
+    parser.add_argument("--ops", type=int, default=200,
+                        help="saves / lookups timed per ledger size")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="simulated Sheets round trip (s) for the save suite")
+    parser.add_argument("--max-growth", type=float,
+                        help="fail if the largest ledger is this many times slower")
+    args = parser.parse_args(argv)
+    for name in sorted(SUITES) if args.suite == "all" else [args.suite]:
+        print(f"\n== {name} ==")
+        SUITES[name](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""Bulk import / export of guest records.
+
+    python bulk.py import history.csv   --ledger /path/user_data.csv
+    python bulk.py import history.jsonl --ledger /path/user_data.csv --no-sheets
+    python bulk.py export backup.jsonl  --ledger /path/user_data.csv
+
+`import` streams the file in chunks. Each chunk is validated and normalized
+column by column (`sheet_frame`). The good rows are written to the ledger
+with one locked append and queued in the same outbox the desk apps use.
+Rows that fail validation go to `<file>.rejects.csv` (e.g.
+`history.csv.rejects.csv`) with a reason. While the next chunk is being
+read, the sync worker sends queued rows to Google Sheets in large
+`append_rows` batches, at most `--per-minute` requests a minute. Sheets appends must stay in order, so the upload runs alongside
+reading rather than in parallel with itself.
+
+Progress is written to stderr and a checkpoint to `<file>.import.json` after
+every chunk. Re-running the same command resumes after the last chunk;
+`--restart` starts over.
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+import pandas as pd
+
+from ledger import LEDGER_COLUMNS, GuestLedger, read_json, sidecar_path, write_json
+from pricing import price_frame
+from rooms import ROOM_TYPES
+from sheets_sync import (SHEET_COLUMNS, LazyWorksheet, Outbox, SheetSyncWorker,
+                         sheet_frame)
+
+SECRETS_FILE = os.path.join(".streamlit", "secrets.toml")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 1 · READING & NORMALIZING
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _is_jsonl(path):
+    return os.path.splitext(path)[1].lower() in (".jsonl", ".ndjson", ".json")
+
+
+def read_chunks(path, chunk_size, skip=0):
+    """Yield string-valued frames of `chunk_size` rows, after `skip` data rows."""
+    if _is_jsonl(path):
+        with open(path, encoding="utf-8") as fh:
+            for _ in range(skip):
+                fh.readline()
+            for chunk in pd.read_json(fh, lines=True, chunksize=chunk_size, dtype=False):
+                yield chunk.astype(object).where(chunk.notna(), "").astype(str)
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False,
+                               skiprows=range(1, skip + 1), encoding="utf-8-sig")
+
+
+def _canonical(df):
+    """Match column names case- and space-insensitively to the ledger's."""
+    names = {c.lower().replace(" ", ""): c for c in LEDGER_COLUMNS}
+    return df.rename(columns=lambda c: names.get(str(c).lower().replace(" ", ""), c))
+
+
+def normalize(chunk, now=None):
+    """Split a raw chunk into ledger-ready rows and rejected rows.
+
+    Dates become `YYYY-MM-DD`, phone and Aadhar numbers digits only, and a
+    missing rent, stay length or bill is filled in with `price_frame`.
+    Returns `(clean, rejects)`; `rejects` is the raw rows plus a `Reason`.
+    """
+    raw = _canonical(chunk)
+    df = pd.DataFrame({
+        col: raw[col].astype(str).str.strip() if col in raw else "" for col in LEDGER_COLUMNS
+    }, index=raw.index)
+    reason = pd.Series("", index=df.index)
+
+    def reject(mask, why):
+        reason[mask & (reason == "")] = why
+
+    check_in = pd.to_datetime(df["Check-in Date"], errors="coerce", format="ISO8601")
+    check_out = pd.to_datetime(df["Check-out Date"], errors="coerce", format="ISO8601")
+    stamp = pd.to_datetime(df["Date & Time"], errors="coerce", format="ISO8601")
+    mobile = df["Mobile Number"].str.replace(r"\D", "", regex=True)
+    aadhar = df["Aadhar Card Number"].str.replace(r"\D", "", regex=True)
+    age = pd.to_numeric(df["Age"], errors="coerce")
+
+    reject(df["Name"] == "", "missing name")
+    reject(check_in.isna(), "bad check-in date")
+    reject(check_out.isna(), "bad check-out date")
+    reject(check_out < check_in, "check-out before check-in")
+    reject((df["Date & Time"] != "") & stamp.isna(), "bad date & time")
+    reject((mobile != "") & (mobile.str.len() < 10), "bad mobile number")
+    reject((aadhar != "") & (aadhar.str.len() != 12), "bad Aadhar number")
+    reject((df["Age"] != "") & ~age.between(0, 130), "bad age")
+    reject((df["Room Type"] != "") & ~df["Room Type"].isin(ROOM_TYPES), "unknown room type")
+
+    bad = reason != ""
+    rejects = chunk[bad].assign(Reason=reason[bad])
+    df = df[~bad].copy()
+    if df.empty:
+        return sheet_frame(df), rejects
+
+    now = now or datetime.datetime.now()
+    df["Date & Time"] = stamp[~bad].dt.strftime("%Y-%m-%d %H:%M:%S") \
+        .fillna(now.strftime("%Y-%m-%d %H:%M:%S"))
+    df["Check-in Date"] = check_in[~bad]
+    df["Check-out Date"] = check_out[~bad]
+    df["Mobile Number"] = mobile[~bad]
+    df["Aadhar Card Number"] = aadhar[~bad]
+    df["Age"] = age[~bad].round().astype("Int64")
+    priced = price_frame(df)
+    for col in ("Room Rent", "Total Stay", "Total Bill"):
+        given = pd.to_numeric(df[col], errors="coerce")
+        df[col] = given.fillna(priced[col])
+    df["Total Stay"] = df["Total Stay"].round().astype("Int64")
+    df["Total Bill"] = df["Total Bill"].round(2)
+    return sheet_frame(df), rejects
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 2 · PROGRESS & CHECKPOINT
+# ─────────────────────────────────────────────────────────────────────────────
+
+class Progress:
+    """One self-overwriting status line on stderr, at most every `interval` s."""
+
+    def __init__(self, label, interval=0.5, stream=sys.stderr):
+        self.label = label
+        self.interval = interval
+        self.stream = stream
+        self.started = time.perf_counter()
+        self._shown = 0.0
+
+    def update(self, done, force=False, **counts):
+        now = time.perf_counter()
+        if not force and now - self._shown < self.interval:
+            return
+        self._shown = now
+        rate = done / max(now - self.started, 1e-9)
+        extra = "".join(f" | {k.replace('_', ' ')} {v:,}" for k, v in counts.items())
+        self.stream.write(f"\r{self.label} {done:,} rows{extra} | {rate:,.0f} rows/s ")
+        self.stream.flush()
+
+    def close(self):
+        self.stream.write("\n")
+        self.stream.flush()
+
+
+def _source_id(path):
+    st = os.stat(path)
+    return {"source": os.path.abspath(path), "size": st.st_size, "mtime": st.st_mtime}
+
+
+def load_checkpoint(path, source, ledger):
+    """Checkpoint of an earlier run over the same, unchanged file, else None."""
+    ckpt = read_json(path)
+    if not ckpt or {k: ckpt.get(k) for k in source} != source:
+        return None
+    if ckpt.get("ledger") != os.path.abspath(ledger.path):
+        return None
+    return ckpt
+
+
+def _already_written(ledger, ckpt, clean):
+    """Did the chunk in flight when the last run died reach the ledger?
+
+    The checkpoint is written just before each append. If the ledger has
+    grown past that point and contains every row of the chunk, the append
+    went through and only the checkpoint update was lost.
+    """
+    if ckpt.get("generation") != ledger.generation():
+        return False
+    tail, _ = ledger.read_since(ckpt["ledger_offset"])
+    if len(tail) < len(clean):
+        return False
+    key = ["Date & Time", "Name", "Check-in Date", "Room Number"]
+    seen = set(pd.DataFrame(tail, columns=ledger.header)[key].itertuples(index=False))
+    mine = clean[key].astype(str).itertuples(index=False)
+    return all(tuple(r) in seen for r in mine)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 3 · SHEETS
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _load_secrets(path):
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        import toml
+        return toml.load(path)
+    with open(path, "rb") as fh:
+        return tomllib.load(fh)
+
+
+def worksheet_opener(secrets_path=SECRETS_FILE):
+    """Same connection the desk app makes, from `.streamlit/secrets.toml`."""
+    def opener():
+        import gspread
+        from google.oauth2.service_account import Credentials
+
+        conn_info = _load_secrets(secrets_path)["connections"]["gsheets"]
+        scopes = [
+            "https://www.googleapis.com/auth/spreadsheets",
+            "https://www.googleapis.com/auth/drive",
+        ]
+        gclient = gspread.authorize(
+            Credentials.from_service_account_info(conn_info["service_account_info"], scopes=scopes)
+        )
+        ws = gclient.open_by_url(conn_info["spreadsheet"]).sheet1
+        if not ws.row_values(1):
+            ws.append_row(SHEET_COLUMNS)
+        return ws
+    return opener
+
+
+def drain(worker, progress):
+    """Wait for the worker to empty the outbox, reporting as it goes."""
+    worker.notify()
+    while True:
+        pending = worker.outbox.pending()
+        progress.update(worker.pushed, pending=pending, force=not pending)
+        if not pending:
+            return
+        if worker.last_error is not None:
+            progress.update(worker.pushed, pending=pending, retries=worker.failures)
+        time.sleep(0.5)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 4 · COMMANDS
+# ─────────────────────────────────────────────────────────────────────────────
+
+def import_file(args):
+    ledger = GuestLedger(args.ledger)
+    source = _source_id(args.file)
+    # Keyed on the full name, so hist.csv and hist.jsonl never share them
+    ckpt_path = args.file + ".import.json"
+    rejects_path = args.file + ".rejects.csv"
+    ckpt = None if args.restart else load_checkpoint(ckpt_path, source, ledger)
+    if ckpt is None:
+        ckpt = dict(source, ledger=os.path.abspath(ledger.path), rows_done=0,
+                    imported=0, rejected=0, pending=None,
+                    started=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        if os.path.exists(rejects_path):
+            os.remove(rejects_path)
+    elif ckpt["rows_done"]:
+        print(f"resuming {args.file} after row {ckpt['rows_done']:,}", file=sys.stderr)
+
+    outbox = worker = None
+    if args.sheets:
+        outbox = Outbox(sidecar_path(ledger.path, "outbox.jsonl"))
+        worker = SheetSyncWorker(outbox, LazyWorksheet(worksheet_opener(args.secrets)),
+                                 batch_size=args.batch_size, max_per_minute=args.per_minute)
+        worker.start()
+
+    def counts():
+        extra = {"sent_to_sheets": worker.pushed} if worker else {}
+        return dict(rejected=ckpt["rejected"], **extra)
+
+    # Rows without a timestamp get the time the import started, on every resume
+    started = datetime.datetime.fromisoformat(ckpt["started"])
+    progress = Progress("imported")
+    for chunk in read_chunks(args.file, args.chunk_size, skip=ckpt["rows_done"]):
+        clean, rejects = normalize(chunk, now=started)
+        # A chunk is saved in stages ("ledger", then "outbox"); the stage in the
+        # checkpoint says where a previous run stopped
+        stage = ckpt["pending"]
+        if stage is None or "rejects_size" not in ckpt:
+            ckpt["rejects_size"] = os.path.getsize(rejects_path) if os.path.exists(rejects_path) else 0
+        if stage == "ledger" and _already_written(ledger, ckpt, clean):
+            stage = "outbox"
+        if stage != "outbox":
+            ckpt.update(pending="ledger", ledger_offset=os.path.getsize(ledger.path),
+                        generation=ledger.generation())
+            write_json(ckpt_path, ckpt)
+            ledger.append_many(clean.to_dict("records"))
+        if outbox is not None:
+            sheet_rows = clean[SHEET_COLUMNS].to_numpy().tolist()
+            if stage == "outbox" and "outbox_offset" in ckpt and outbox.holds(
+                    ckpt["outbox_inode"], ckpt["outbox_offset"], sheet_rows):
+                stage = "queued"  # the put went through; only the checkpoint was lost
+            if stage != "queued":
+                inode, size = outbox.tail()
+                ckpt.update(pending="outbox", outbox_inode=inode, outbox_offset=size)
+                write_json(ckpt_path, ckpt)
+                outbox.put_many(sheet_rows)
+            worker.notify()
+        if len(rejects):
+            # Drop whatever a crashed run already wrote for this chunk
+            with open(rejects_path, "a") as fh:
+                fh.truncate(ckpt["rejects_size"])
+            rejects.to_csv(rejects_path, mode="a", index=False,
+                           header=ckpt["rejects_size"] == 0)
+        ckpt.update(pending=None, rows_done=ckpt["rows_done"] + len(chunk),
+                    imported=ckpt["imported"] + len(clean),
+                    rejected=ckpt["rejected"] + len(rejects))
+        write_json(ckpt_path, ckpt)
+        progress.update(ckpt["imported"], **counts())
+    progress.update(ckpt["imported"], force=True, **counts())
+    progress.close()
+
+    if worker is not None:
+        uploading = Progress("sent to Google Sheets")
+        drain(worker, uploading)
+        uploading.close()
+        worker.stop()
+    print(f"{ckpt['imported']:,} rows imported into {ledger.path}, "
+          f"{ckpt['rejected']:,} rejected"
+          + (f" (see {rejects_path})" if ckpt["rejected"] else ""), file=sys.stderr)
+
+
+def export_file(args):
+    """Stream the ledger to CSV or JSONL without loading it all at once."""
+    jsonl = _is_jsonl(args.file)
+    tmp = args.file + ".tmp"
+    progress = Progress("exported")
+    done = 0
+    with open(tmp, "w", encoding="utf-8", newline="") as out:
+        for chunk in pd.read_csv(args.ledger, chunksize=args.chunk_size, dtype=str,
+                                 keep_default_na=False, encoding="utf-8-sig"):
+            if jsonl:
+                out.write(chunk.to_json(orient="records", lines=True, force_ascii=False))
+            else:
+                chunk.to_csv(out, index=False, header=done == 0)
+            done += len(chunk)
+            progress.update(done)
+    os.replace(tmp, args.file)
+    progress.update(done, force=True)
+    progress.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("file", help="CSV, or JSONL (.jsonl / .ndjson / .json)")
+    parser.add_argument("--ledger", default="user_data.csv")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--no-sheets", dest="sheets", action="store_false",
+                        help="write the ledger only")
+    parser.add_argument("--secrets", default=SECRETS_FILE)
+    parser.add_argument("--batch-size", type=int, default=5_000,
+                        help="rows per append_rows call")
+    parser.add_argument("--per-minute", type=int, default=50,
+                        help="max Sheets write requests per minute")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore the checkpoint of an earlier run")
+    args = parser.parse_args(argv)
+    {"import": import_file, "export": export_file}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Typed, columnar copy of the guest ledger for analytics.
+
+`user_data.csv` stays the write path (cheap appends). This module mirrors
+it into Parquet files partitioned by check-in month
+(`check_in_month=2025-01/…`), with a fixed Arrow schema. Dates are dates,
+ages are integers and bills are floats, whatever order the CSV columns
+are in. The mirror follows the ledger with `read_since`, so the first
+`refresh` is the one-shot CSV migration and later ones only add the new
+rows. Reporting queries read just the columns and month partitions they
+need; the Reports page refreshes the mirror on every visit and uses it for
+per-period breakdowns.
+
+    python columnar.py migrate /path/user_data.csv /path/user_data.parquet
+    python columnar.py compact /path/user_data.csv /path/user_data.parquet
+"""
+
+import argparse
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from ledger import GuestLedger, open_locked, read_json, sidecar_path, write_json
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 1 · SCHEMA
+# ─────────────────────────────────────────────────────────────────────────────
+
+SCHEMA = pa.schema([
+    ("Date & Time", pa.timestamp("s")),
+    ("Name", pa.string()),
+    ("Discount Applied", pa.string()),
+    ("Mobile Number", pa.string()),
+    ("Aadhar Card Number", pa.string()),
+    ("Age", pa.int16()),
+    ("Nationality", pa.string()),
+    ("Address", pa.string()),
+    ("Check-in Date", pa.date32()),
+    ("Check-out Date", pa.date32()),
+    ("Room Number", pa.string()),
+    ("Room Type", pa.string()),
+    ("Room Rent", pa.float64()),
+    ("Total Stay", pa.int32()),
+    ("Total Bill", pa.float64()),
+    ("check_in_month", pa.string()),
+])
+
+PARTITIONING = ds.partitioning(pa.schema([("check_in_month", pa.string())]), flavor="hive")
+
+_TIMESTAMPS = ["Date & Time"]
+_DATES = ["Check-in Date", "Check-out Date"]
+# Values outside these bounds (a mistyped or misheard age) become null
+_INTS = {"Age": (0, 130), "Total Stay": (0, 2**31 - 1)}
+_FLOATS = ["Room Rent", "Total Bill"]
+
+
+def typed_table(rows):
+    """Ledger rows (dicts of strings) → Arrow table in `SCHEMA`."""
+    df = pd.DataFrame(rows, columns=[f.name for f in SCHEMA][:-1])
+    for col in _TIMESTAMPS:
+        df[col] = pd.to_datetime(df[col], errors="coerce")
+    for col in _DATES:
+        df[col] = pd.to_datetime(df[col], errors="coerce").dt.date
+    for col, (lo, hi) in _INTS.items():
+        v = pd.to_numeric(df[col], errors="coerce").round()
+        df[col] = v.where(v.between(lo, hi)).astype("Int64")
+    for col in _FLOATS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in df.columns.difference(_TIMESTAMPS + _DATES + list(_INTS) + _FLOATS):
+        df[col] = df[col].fillna("").astype(str)
+    months = pd.to_datetime(df["Check-in Date"], errors="coerce").dt.strftime("%Y-%m")
+    df["check_in_month"] = months.fillna("unknown")
+    return pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+
+
+def _month(d):
+    return pd.Timestamp(d).strftime("%Y-%m")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 2 · STORE
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ColumnarLedger:
+    """Parquet mirror of a `GuestLedger`, partitioned by check-in month."""
+
+    def __init__(self, ledger, root=None):
+        self.ledger = ledger
+        self.root = root or sidecar_path(ledger.path, "parquet")
+        self.state_path = os.path.join(self.root, "_state.json")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _state(self):
+        return read_json(self.state_path) or {}
+
+    def refresh(self):
+        """Append rows saved since the last refresh; returns how many."""
+        with open_locked(os.path.join(self.root, "_state.lock")):
+            state = self._state()
+            generation = self.ledger.generation()
+            if state.get("generation") != generation:  # first run, or ledger rewritten
+                self._clear()
+                state = {"generation": generation, "offset": 0, "max_nights": 0}
+            rows, offset = self.ledger.read_since(state["offset"])
+            if rows:
+                table = typed_table(rows)
+                ds.write_dataset(
+                    table, self.root, format="parquet", partitioning=PARTITIONING,
+                    basename_template=f"part-{uuid.uuid4().hex[:12]}-{{i}}.parquet",
+                    existing_data_behavior="overwrite_or_ignore",
+                )
+                # Longest stay seen bounds how far back occupancy queries look
+                stay = table.column("Check-out Date").to_numpy(zero_copy_only=False) \
+                    - table.column("Check-in Date").to_numpy(zero_copy_only=False)
+                nights = pd.to_timedelta(pd.Series(stay)).dt.days.max()
+                state["max_nights"] = int(max(state["max_nights"], 0 if pd.isna(nights) else nights))
+            state["offset"] = offset
+            write_json(self.state_path, state)
+            return len(rows)
+
+    def _clear(self):
+        for name in os.listdir(self.root):
+            if name.startswith("check_in_month="):
+                shutil.rmtree(os.path.join(self.root, name))
+
+    def compact(self):
+        """Merge each month's small per-refresh files into one."""
+        with open_locked(os.path.join(self.root, "_state.lock")):
+            for name in os.listdir(self.root):
+                part = os.path.join(self.root, name)
+                files = [f for f in os.listdir(part) if f.endswith(".parquet")] \
+                    if name.startswith("check_in_month=") else []
+                if len(files) < 2:
+                    continue
+                table = pa.concat_tables(
+                    pq.ParquetFile(os.path.join(part, f)).read() for f in files
+                )
+                pq.write_table(table, os.path.join(part, f"part-{uuid.uuid4().hex[:12]}-0.parquet"))
+                for f in files:
+                    os.remove(os.path.join(part, f))
+
+    # ── queries ─────────────────────────────────────────────────────────────
+
+    def scan(self, columns, start=None, end=None, lookback_days=0):
+        """Only `columns` of stays checking in within [start - lookback, end).
+
+        Month partitions outside the range are never opened; the row filter
+        on `Check-in Date` trims the edge months.
+        """
+        dataset = ds.dataset(self.root, format="parquet", partitioning=PARTITIONING,
+                             schema=SCHEMA, exclude_invalid_files=True)
+        month, checkin = ds.field("check_in_month"), ds.field("Check-in Date")
+        filt = None
+        if start is not None:
+            first = pd.Timestamp(start) - pd.Timedelta(days=lookback_days)
+            filt = (month >= _month(first)) & (month != "unknown") \
+                & (checkin >= pa.scalar(first.date(), pa.date32()))
+        if end is not None:
+            last = pd.Timestamp(end)
+            upper = (month <= _month(last)) & (month != "unknown") \
+                & (checkin < pa.scalar(last.date(), pa.date32()))
+            filt = upper if filt is None else filt & upper
+        return dataset.to_table(columns=columns, filter=filt).to_pandas()
+
+    def occupancy_by_date(self, start, end):
+        """Rooms occupied on each night in [start, end)."""
+        df = self.scan(["Check-in Date", "Check-out Date"], start, end,
+                       lookback_days=self._state().get("max_nights", 0))
+        lo = np.datetime64(pd.Timestamp(start).date(), "D")
+        hi = np.datetime64(pd.Timestamp(end).date(), "D")
+        s = df["Check-in Date"].to_numpy("datetime64[D]")
+        e = df["Check-out Date"].to_numpy("datetime64[D]")
+        keep = ~(np.isnat(s) | np.isnat(e)) & (e > s) & (s < hi) & (e > lo)
+        s = np.maximum(s[keep], lo) - lo
+        e = np.minimum(e[keep], hi) - lo
+        diff = np.zeros(int((hi - lo).astype(int)) + 1, dtype=np.int64)
+        np.add.at(diff, s.astype(int), 1)
+        np.add.at(diff, e.astype(int), -1)
+        return pd.Series(np.cumsum(diff)[:-1], index=pd.date_range(start, end, inclusive="left"),
+                         name="Rooms occupied")
+
+    def revenue_by_room_type(self, start=None, end=None):
+        df = self.scan(["Room Type", "Total Bill"], start, end)
+        return df.groupby("Room Type")["Total Bill"].sum().sort_values(ascending=False)
+
+    def discount_uptake(self, start=None, end=None):
+        """Share of stays per offer."""
+        df = self.scan(["Discount Applied"], start, end)
+        return df["Discount Applied"].replace("", "None").value_counts(normalize=True)
+
+
+def migrate_csv(csv_path, root=None):
+    """One-shot CSV → Parquet migration (safe to re-run: it resumes)."""
+    store = ColumnarLedger(GuestLedger(csv_path), root)
+    return store, store.refresh()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["migrate", "compact"])
+    parser.add_argument("csv")
+    parser.add_argument("root", nargs="?")
+    args = parser.parse_args(argv)
+    store, added = migrate_csv(args.csv, args.root)
+    print(f"{added:,} new rows → {store.root}")
+    if args.command == "compact":
+        store.compact()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# test_gsheets.py is a Streamlit demo app, not a test module
+collect_ignore = ["test_gsheets.py"]
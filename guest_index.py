@@ -0,0 +1,128 @@
+"""Returning-guest lookup by Mobile Number or Aadhar Card Number.
+
+The index maps normalized phone / Aadhar numbers to the guest's most recent
+personal details. It is built once from the ledger and persisted as a
+compact JSON sidecar (one record per guest; the key map is rebuilt on load)
+together with the ledger offset it covers. On restart
+only the rows appended since that offset are replayed, and each save costs
+one `read_since` of the new tail.
+"""
+
+import re
+import threading
+
+from ledger import read_json, sidecar_path, write_json
+from perf import span
+
+PERSONAL_FIELDS = [
+    "Name", "Mobile Number", "Aadhar Card Number", "Age", "Nationality", "Address",
+]
+
+
+def _digits(v):
+    s = str(v or "").strip()
+    if s.endswith(".0"):  # numbers that went through a float column
+        s = s[:-2]
+    return re.sub(r"\D", "", s)
+
+
+def mobile_key(v):
+    d = _digits(v)[-10:]
+    return f"m:{d}" if len(d) == 10 else None
+
+
+def aadhar_key(v):
+    d = _digits(v)
+    return f"a:{d}" if len(d) == 12 else None
+
+
+def lookup_keys(v):
+    """Keys to try for a number typed at the desk, most likely first.
+
+    Twelve digits is an Aadhar number unless written with a +91 prefix.
+    A mobile is 10 digits, 11 with a leading 0, or +91 and 10 digits.
+    """
+    s, d = str(v or "").strip(), _digits(v)
+    mobile = len(d) == 10 or (len(d) == 11 and d.startswith("0")) \
+        or (len(d) == 12 and s.startswith("+91"))
+    keys = [aadhar_key(d)] if len(d) == 12 and not s.startswith("+") else []
+    return keys + ([f"m:{d[-10:]}"] if mobile else [])
+
+
+class GuestIndex:
+    """O(1) lookup of a guest's last known personal details."""
+
+    def __init__(self, ledger, path=None, snapshot_every=1000):
+        self.ledger = ledger
+        self.path = path or sidecar_path(ledger.path, "index.json")
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self.generation = ledger.generation()
+        snap = read_json(self.path) or {}
+        if "records" in snap:
+            # A snapshot from before a compaction or rotation still knows every
+            # guest; only the offset into the replaced file is meaningless
+            same = snap.get("generation") == self.generation
+            self.offset = snap["offset"] if same else 0
+            self.records = snap["records"]
+            self.keys = self._keys_for(self.records)
+        else:
+            self.offset, self.records, self.keys = 0, [], {}
+            for row in ledger.read_archived():
+                self._add(row)
+        self._unsaved = 0
+        self.refresh(snapshot=True)
+
+    @staticmethod
+    def _record_keys(record):
+        return [k for k in (mobile_key(record[1]), aadhar_key(record[2])) if k]
+
+    @classmethod
+    def _keys_for(cls, records):
+        """Rebuild the key map from the snapshot; later records win."""
+        return {k: i for i, r in enumerate(records) for k in cls._record_keys(r)}
+
+    def _add(self, row):
+        record = [str(row.get(f) or "") for f in PERSONAL_FIELDS]
+        keys = self._record_keys(record)
+        if not keys:
+            return
+        idx = next((self.keys[k] for k in keys if k in self.keys), None)
+        if idx is None:
+            idx = len(self.records)
+            self.records.append(record)
+        else:
+            self.records[idx] = record
+        for k in keys:
+            self.keys[k] = idx
+
+    def refresh(self, snapshot=False):
+        """Index rows saved since the last call (by any terminal)."""
+        with self._lock, span("index.refresh"):
+            generation = self.ledger.generation()
+            if generation != self.generation:  # compacted or rotated: replay, keep guests
+                self.generation = generation
+                self.offset = 0
+            rows, self.offset = self.ledger.read_since(self.offset)
+            for row in rows:
+                self._add(row)
+            self._unsaved += len(rows)
+            if self._unsaved and (snapshot or self._unsaved >= self.snapshot_every):
+                self.save()
+
+    def save(self):
+        write_json(self.path, {
+            "generation": self.generation, "offset": self.offset,
+            "records": self.records,
+        })
+        self._unsaved = 0
+
+    def lookup(self, number):
+        """Personal details for a mobile or Aadhar number, or None."""
+        for key in lookup_keys(number):
+            if key in self.keys:
+                return dict(zip(PERSONAL_FIELDS, self.records[self.keys[key]]))
+        return None
+
+    def __len__(self):
+        return len(self.records)
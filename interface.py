@@ -1,51 +1,71 @@
 # streamlit_app.py
 
-import os
 import datetime
-import numbers
-import numpy as np
+import os
+import time
 import pandas as pd
 import streamlit as st
-from streamlit_gsheets import GSheetsConnection
 import gspread
 from google.oauth2.service_account import Credentials
+from ledger import sidecar_path
+from resources import (CSV_FILE, aggregates as _aggregates, guest_index as _guest_index,
+                       rooms as _rooms)
+from rooms import ROOM_TYPES
+from pricing import price_stay
+from sheets_sync import SHEET_COLUMNS, LazyWorksheet, Outbox, SheetSyncWorker, to_sheet
+from sheet_preview import SheetPreview, page_count, paginate
+from perf import TIMINGS, span
+
+run_started = time.perf_counter()
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 1 · CONFIG & CONNECTIONS
 # ─────────────────────────────────────────────────────────────────────────────
 
-CSV_FILE = "/Users/adityahemantshahane/Desktop/codes/user_data.csv"
-
 # Pull out the connection info and credentials separately
 conn_info      = st.secrets["connections"]["gsheets"]
 SPREADSHEET_URL = conn_info["spreadsheet"]
 svc_creds       = conn_info["service_account_info"]
 
-@st.cache_resource(show_spinner=False)
-def _gspread_client():
+# Column order used everywhere
+expected_cols = SHEET_COLUMNS
+
+def _open_worksheet():
     scopes = [
         "https://www.googleapis.com/auth/spreadsheets",
         "https://www.googleapis.com/auth/drive",
     ]
-    return gspread.authorize(
+    gclient = gspread.authorize(
         Credentials.from_service_account_info(svc_creds, scopes=scopes)
     )
+    ws = gclient.open_by_url(SPREADSHEET_URL).sheet1
+    # If sheet is empty → create header row once
+    if not ws.row_values(1):
+        ws.append_row(expected_cols)
+    return ws
+
+# Nothing talks to Google until the first write (or an opened preview);
+# after that the handle and header check are reused for the whole process
+@st.cache_resource(show_spinner=False)
+def _worksheet():
+    return LazyWorksheet(_open_worksheet)
 
-# Initialize clients
-gclient     = _gspread_client()
-worksheet   = gclient.open_by_url(SPREADSHEET_URL).sheet1
-conn_reader = st.connection("gsheets", type=GSheetsConnection)
+# Cached sheet rows for the preview, refreshed incrementally
+PREVIEW_PAGE_SIZE = 50
 
-# Column order used everywhere
-expected_cols = [
-    "Date & Time", "Name", "Mobile Number", "Aadhar Card Number", "Age",
-    "Nationality", "Address", "Check-in Date", "Check-out Date",
-    "Room Number", "Room Type", "Room Rent", "Total Stay", "Total Bill"
-]
+@st.cache_resource(show_spinner=False)
+def _preview():
+    return SheetPreview(_worksheet(), ttl=60)
 
-# If sheet is empty → create header row once
-if not worksheet.get_all_values():
-    worksheet.append_row(expected_cols)
+# Background Sheets sync – saves go to a local outbox, this thread ships them
+@st.cache_resource(show_spinner=False)
+def _sync_worker():
+    worker = SheetSyncWorker(
+        Outbox(sidecar_path(CSV_FILE, "outbox.jsonl")), _worksheet(),
+        on_flush=_preview().invalidate,
+    )
+    worker.start()
+    return worker
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 2 · SESSION DEFAULTS
@@ -55,22 +75,7 @@ if "user_data" not in st.session_state:
     st.session_state.user_data = {}
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 3 · UTILITY – convert cells to JSON-safe values
-# ─────────────────────────────────────────────────────────────────────────────
-
-def to_sheet(v):
-    if pd.isna(v):
-        return ""
-    if isinstance(v, (datetime.date, datetime.datetime, pd.Timestamp)):
-        return v.strftime("%Y-%m-%d")
-    if isinstance(v, (numbers.Integral, np.integer)):
-        return int(v)
-    if isinstance(v, (numbers.Real, np.floating)):
-        return float(v)
-    return str(v)
-
-# ─────────────────────────────────────────────────────────────────────────────
-# 4 · UI
+# 3 · UI
 # ─────────────────────────────────────────────────────────────────────────────
 
 st.title("🍽️ Welcome to Oceano Retreat")
@@ -81,6 +86,22 @@ st.session_state.user_data["Date & Time"] = now_str
 
 # 👤 Personal details
 with st.expander("👤 Personal Details", expanded=True):
+    # Returning guest → autofill from the index
+    l1, l2 = st.columns([3, 1])
+    with l1:
+        lookup = st.text_input("🔎 Returning guest? Mobile or Aadhar number")
+    with l2:
+        if st.button("Autofill") and lookup:
+            with span("lookup"):
+                index = _guest_index()
+                index.refresh()  # pick up other terminals' saves
+                found = index.lookup(lookup)
+            if found:
+                st.session_state.user_data.update(found)
+                st.success(f"Welcome back, {found['Name']}!")
+            else:
+                st.info("No previous stay found.")
+
     for label, key in [
         ("Name", "Name"),
         ("Mobile Number", "Mobile Number"),
@@ -102,8 +123,11 @@ with st.expander("🏨 Stay Details"):
                 "Check-in Date", datetime.date.today()
             )
         )
-        st.session_state.user_data["Room Number"] = st.text_input(
-            "Room Number", st.session_state.user_data.get("Room Number", "")
+        st.session_state.user_data["Room Type"] = st.selectbox(
+            "Room Type", ROOM_TYPES,
+            index=ROOM_TYPES.index(
+                st.session_state.user_data.get("Room Type", "Single")
+            )
         )
     with c2:
         st.session_state.user_data["Check-out Date"] = st.date_input(
@@ -111,24 +135,31 @@ with st.expander("🏨 Stay Details"):
                 "Check-out Date", datetime.date.today()
             )
         )
-        st.session_state.user_data["Room Type"] = st.selectbox(
-            "Room Type", ["Single", "Double", "Suite"],
-            index=["Single", "Double", "Suite"].index(
-                st.session_state.user_data.get("Room Type", "Single")
+        # Only rooms with no overlapping stay are offered
+        with span("rooms.free"):
+            rooms = _rooms()
+            rooms.refresh()
+            free = rooms.free_rooms(
+                st.session_state.user_data["Room Type"],
+                st.session_state.user_data["Check-in Date"],
+                st.session_state.user_data["Check-out Date"],
             )
-        )
-
-    # Fixed room rent
-    st.session_state.user_data["Room Rent"] = 1000
+        current = st.session_state.user_data.get("Room Number", "")
+        if free:
+            st.session_state.user_data["Room Number"] = st.selectbox(
+                f"Room Number ({len(free)} free)", free,
+                index=free.index(current) if current in free else 0
+            )
+        else:
+            st.session_state.user_data["Room Number"] = ""
+            st.warning("No rooms of this type are free for these dates.")
 
-    # Stay length & bill
-    st.session_state.user_data["Total Stay"] = (
-        st.session_state.user_data["Check-out Date"] -
-        st.session_state.user_data["Check-in Date"]
-    ).days
-    st.session_state.user_data["Total Bill"] = (
-        st.session_state.user_data["Total Stay"] * 1000
-    )
+    # Room-type rate, seasonal multipliers → rent, stay length & bill
+    st.session_state.user_data.update(price_stay(
+        st.session_state.user_data["Check-in Date"],
+        st.session_state.user_data["Check-out Date"],
+        st.session_state.user_data["Room Type"],
+    ))
 
     st.info(
         f"Stay = {st.session_state.user_data['Total Stay']} nights  •  "
@@ -136,35 +167,79 @@ with st.expander("🏨 Stay Details"):
     )
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 5 · SAVE BUTTON
+# 4 · SAVE BUTTON
 # ─────────────────────────────────────────────────────────────────────────────
 
-if st.button("💾 Save All Details"):
-    row_df = pd.DataFrame([st.session_state.user_data])
+sync = _sync_worker()
 
-    # Local CSV backup
-    if os.path.exists(CSV_FILE):
-        pd.concat([pd.read_csv(CSV_FILE), row_df], ignore_index=True) \
-          .to_csv(CSV_FILE, index=False)
+if st.button("💾 Save All Details"):
+    room = st.session_state.user_data["Room Number"]
+    if not room:
+        st.error("❌ No room selected – none of this type is free for these dates.")
+    elif st.session_state.user_data["Check-out Date"] <= st.session_state.user_data["Check-in Date"]:
+        st.error("❌ Check-out must be at least one night after check-in.")
     else:
-        row_df.to_csv(CSV_FILE, index=False)
-
-    # Append one row to the sheet
-    try:
-        worksheet.append_row(
-            [to_sheet(row_df.iloc[0][col]) for col in expected_cols],
-            value_input_option="USER_ENTERED"
-        )
-        st.success("✅ Saved to Google Sheets.")
-    except Exception as e:
-        st.error(f"❌ Google-Sheet write failed: {e}")
+        with span("save"):
+            row_df = pd.DataFrame([st.session_state.user_data])
+
+            # Local CSV backup: one locked append, refused if another
+            # terminal has taken the room for these dates in the meantime
+            saved = _rooms().reserve(st.session_state.user_data)
+            if saved:
+                _guest_index().refresh()
+                _aggregates().refresh()
+                _rooms().refresh()
+
+                # Queue the row for Google Sheets; the sync worker sends it in the background
+                with span("outbox.put"):
+                    sync.outbox.put([to_sheet(row_df.iloc[0][col]) for col in expected_cols])
+                sync.notify()
+        if saved:
+            st.success("✅ Saved. Syncing to Google Sheets in the background.")
+        else:
+            st.error(f"❌ Room {room} is already booked for these dates.")
+
+if sync.last_error is not None:
+    st.warning(
+        f"⏳ {sync.outbox.pending()} row(s) waiting for Google Sheets "
+        f"(retrying): {sync.last_error}"
+    )
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 6 · OPTIONAL PREVIEW
+# 5 · OPTIONAL PREVIEW
 # ─────────────────────────────────────────────────────────────────────────────
 
 with st.expander("📊 View current sheet data"):
-    try:
-        st.dataframe(conn_reader.read())
-    except Exception as e:
-        st.warning(f"Could not load sheet: {e}")
+    # Opt-in, so a slow or unreachable Google never holds up the page
+    if st.checkbox("Load from Google Sheets"):
+        try:
+            sheet_df = _preview().frame()
+            pages = page_count(sheet_df, PREVIEW_PAGE_SIZE)
+            page = st.number_input("Page", 1, pages, pages)
+            st.dataframe(paginate(sheet_df, page, PREVIEW_PAGE_SIZE))
+            st.caption(f"{len(sheet_df)} rows · page {page} of {pages}")
+        except Exception as e:
+            st.warning(f"Could not load sheet: {e}")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 6 · STARTUP METRIC
+# ─────────────────────────────────────────────────────────────────────────────
+
+render_ms = TIMINGS.record("rerun", time.perf_counter() - run_started, app="interface")["ms"]
+connect_s = _worksheet().connect_seconds
+st.caption(
+    f"⚡ Page rendered in {render_ms:.0f} ms  •  Google Sheets "
+    + (f"connected in {connect_s * 1000:.0f} ms" if connect_s is not None
+       else "not connected yet")
+)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 7 · DEBUG TIMINGS (opt-in)
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Where this terminal's time goes (spans from perf.py), for troubleshooting
+if st.sidebar.checkbox("Debug timings", value=bool(os.environ.get("OCEANO_DEBUG"))):
+    with st.sidebar.expander("🐢 Debug timings", expanded=True):
+        st.dataframe(TIMINGS.summary())
+        st.caption("Latest spans")
+        st.dataframe(pd.DataFrame(TIMINGS.recent(limit=20)[::-1]))
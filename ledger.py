@@ -0,0 +1,366 @@
+"""Append-only guest ledger shared by both front-desk apps.
+
+Every save appends exactly one CSV line under an exclusive file lock and
+fsyncs it, so the cost of a save does not depend on how many guests are
+already in the file and two terminals saving at once cannot lose rows.
+
+Maintenance runs from the command line, also while the desk apps are up:
+
+    python ledger.py compact /path/user_data.csv   # canonical columns, drop bad rows
+    python ledger.py rotate  /path/user_data.csv   # archive the file, start empty
+"""
+
+import argparse
+import contextlib
+import csv
+import datetime
+import glob
+import io
+import json
+import os
+import tempfile
+import threading
+import uuid
+
+import pandas as pd
+
+from perf import span
+
+try:
+    import fcntl
+except ImportError:  # Windows – no advisory locks, single terminal only
+    fcntl = None
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 1 · SCHEMA & HELPERS
+# ─────────────────────────────────────────────────────────────────────────────
+
+LEDGER_COLUMNS = [
+    "Date & Time", "Name", "Discount Applied", "Mobile Number",
+    "Aadhar Card Number", "Age", "Nationality", "Address",
+    "Check-in Date", "Check-out Date", "Room Number", "Room Type",
+    "Room Rent", "Total Stay", "Total Bill",
+]
+
+
+@contextlib.contextmanager
+def locked(fh, exclusive=True):
+    """Hold an advisory lock on an open file for the duration of the block."""
+    if fcntl is None:
+        yield fh
+        return
+    fcntl.flock(fh.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+    try:
+        yield fh
+    finally:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def open_locked(path, mode="a+b", exclusive=True):
+    """Open and lock the file *currently* at `path`.
+
+    Files that get swapped out with `os.replace` (ledger compaction, outbox
+    recycling) can change underneath a waiting writer, so after taking the
+    lock we make sure we still hold the inode the path points at.
+    """
+    while True:
+        fh = open(path, mode)
+        try:
+            with locked(fh, exclusive):
+                if os.fstat(fh.fileno()).st_ino == os.stat(path).st_ino:
+                    yield fh
+                    return
+        finally:
+            fh.close()
+
+
+def sidecar_path(path, suffix):
+    """`/x/user_data.csv` + `index.json` → `/x/user_data.index.json`."""
+    root, _ = os.path.splitext(path)
+    return f"{root}.{suffix}"
+
+
+def write_json(path, obj):
+    """Atomically replace `path` with `obj` serialized as JSON.
+
+    Every call writes its own temp file, so concurrent writers (several
+    terminals refreshing the same sidecar) never clobber each other's
+    half-written file; the last `os.replace` wins.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                               prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as fh:
+            json.dump(obj, fh, separators=(",", ":"))
+            _fsync(fh)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp)
+        raise
+
+
+def read_json(path):
+    """Contents of a `write_json` file, or None if missing or unreadable."""
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _cell(v):
+    if v is None or (isinstance(v, float) and v != v):
+        return ""
+    if isinstance(v, (datetime.date, datetime.datetime)):
+        return str(v)
+    return v
+
+
+def _fsync(fh):
+    fh.flush()
+    os.fsync(fh.fileno())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 2 · LEDGER
+# ─────────────────────────────────────────────────────────────────────────────
+
+class GuestLedger:
+    """CSV ledger that is only ever appended to (or rewritten by `compact`)."""
+
+    def __init__(self, path, columns=LEDGER_COLUMNS):
+        self.path = path
+        self.columns = list(columns)
+        self.generation_path = sidecar_path(path, "generation.json")
+        self._held = threading.local()  # write lock held by this thread in `append_if`
+        self.header = self._open()
+        self._header_generation = self.generation()
+        if set(self.columns) - set(self.header):
+            self.compact()
+
+    # ── opening & repair ────────────────────────────────────────────────────
+
+    def _locked_file(self, mode="a+b", exclusive=True):
+        return open_locked(self.path, mode, exclusive)
+
+    def _header_for(self, fh):
+        """Header of the locked file `fh`, re-read if another process replaced it.
+
+        `compact` may reorder the columns; writing or reading the new file
+        with a header cached from the old one would swap fields.
+        """
+        generation = self.generation()
+        if generation != self._header_generation:
+            fh.seek(0)
+            first = fh.readline().decode("utf-8-sig")
+            if first.strip():
+                self.header = next(csv.reader([first]))
+            self._header_generation = generation
+        return self.header
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._locked_file() as fh:
+            self._repair(fh)
+            if read_json(self.generation_path) is None:
+                self._new_generation()
+            fh.seek(0)
+            first = fh.readline().decode("utf-8-sig")
+            if not first.strip():
+                fh.write(self._encode([self.columns]))
+                _fsync(fh)
+                return list(self.columns)
+        return next(csv.reader([first]))
+
+    @staticmethod
+    def _repair(fh):
+        """Drop a torn final line left behind by a crash mid-append."""
+        size = fh.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        fh.seek(size - 1)
+        if fh.read(1) == b"\n":
+            return
+        pos, block = size, 4096
+        while pos > 0:
+            start = max(0, pos - block)
+            fh.seek(start)
+            chunk = fh.read(pos - start)
+            nl = chunk.rfind(b"\n")
+            if nl != -1:
+                fh.truncate(start + nl + 1)
+                break
+            pos = start
+        else:
+            fh.truncate(0)
+        _fsync(fh)
+
+    # ── writing ─────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _encode(lines):
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator="\n").writerows(lines)
+        return buf.getvalue().encode("utf-8")
+
+    @staticmethod
+    def _line(header, row):
+        return [_cell(row.get(col)) for col in header]
+
+    def append(self, row):
+        """Append one guest row; returns the ledger size after the write."""
+        return self.append_many([row])
+
+    def append_many(self, rows):
+        with span("ledger.append") as fields, self._locked_file() as fh:
+            return self._write(fh, rows, fields)
+
+    def append_if(self, row, predicate):
+        """Append `row` only if `predicate()` holds while the write lock is held.
+
+        `predicate` may catch up with `read_since` first (it reuses the held
+        lock), so a check such as "is this room still free?" and the write
+        are atomic across terminals. Returns the ledger size, or None if
+        `row` was refused.
+        """
+        with span("ledger.append") as fields, self._locked_file() as fh:
+            self._repair(fh)
+            self._held.fh = fh
+            try:
+                if not predicate():
+                    return None
+            finally:
+                self._held.fh = None
+            return self._write(fh, [row], fields)
+
+    def _write(self, fh, rows, fields):
+        self._repair(fh)
+        header = self._header_for(fh)
+        data = self._encode(self._line(header, r) for r in rows)
+        fields["bytes"] = len(data)
+        fh.write(data)
+        _fsync(fh)
+        return fh.tell()
+
+    # ── reading ─────────────────────────────────────────────────────────────
+
+    def generation(self):
+        """Changes whenever `compact`/`rotate` replaces the file.
+
+        A random token kept in `user_data.generation.json`, not the inode:
+        the filesystem happily hands a compacted file the inode of the one
+        before, and caches would then trust offsets into the old file.
+        """
+        return (read_json(self.generation_path) or self._new_generation())["token"]
+
+    def _new_generation(self):
+        """Stamp the file now at `path` with a fresh token (under the write lock)."""
+        mark = {"token": uuid.uuid4().hex}
+        write_json(self.generation_path, mark)
+        return mark
+
+    def read(self):
+        return pd.read_csv(self.path)
+
+    def read_since(self, offset=0):
+        """Rows appended after byte `offset`, plus the offset to resume from.
+
+        Lets caches (guest index, room bookings, aggregates) catch up on new
+        saves without re-reading the whole file.
+        """
+        with span("ledger.read_since") as fields:
+            held = getattr(self._held, "fh", None)
+            lock = contextlib.nullcontext(held) if held is not None \
+                else self._locked_file("rb", exclusive=False)
+            with lock as fh:
+                header = self._header_for(fh)
+                fh.seek(0)
+                if offset == 0:
+                    fh.readline()
+                else:
+                    fh.seek(offset)
+                data = fh.read()
+                end = fh.tell()
+            cut = data.rfind(b"\n") + 1
+            end -= len(data) - cut
+            reader = csv.reader(io.StringIO(data[:cut].decode("utf-8")))
+            rows = [dict(zip(header, r)) for r in reader if len(r) == len(header)]
+            fields["rows"] = len(rows)
+        return rows, end
+
+    def archives(self):
+        """Files moved aside by `rotate`, oldest first."""
+        stamp = "[0-9]" * 8 + "-" + "[0-9]" * 6
+        return sorted(glob.glob(glob.escape(sidecar_path(self.path, "")) + stamp + ".csv"))
+
+    def read_archived(self):
+        """Rows of every archive, oldest first (for caches rebuilt after a rotation)."""
+        rows = []
+        for path in self.archives():
+            with open(path, encoding="utf-8-sig", newline="") as fh:
+                reader = csv.reader(fh)
+                header = next(reader, [])
+                rows.extend(dict(zip(header, r)) for r in reader if len(r) == len(header))
+        return rows
+
+    # ── maintenance ─────────────────────────────────────────────────────────
+
+    def compact(self):
+        """Rewrite the file with the canonical header, dropping malformed rows."""
+        tmp = self.path + ".compact"
+        with span("ledger.compact"), self._locked_file() as fh:
+            fh.seek(0)
+            reader = csv.reader(io.StringIO(fh.read().decode("utf-8-sig")))
+            old = next(reader, self.header)
+            header = self.columns + [c for c in old if c not in self.columns]
+            with open(tmp, "wb") as out:
+                out.write(self._encode([header]))
+                out.write(self._encode(
+                    [dict(zip(old, r)).get(c, "") for c in header]
+                    for r in reader if len(r) == len(old)
+                ))
+                _fsync(out)
+            os.replace(tmp, self.path)
+            self.header, self._header_generation = header, self._new_generation()["token"]
+
+    def rotate(self):
+        """Move the current file aside and start an empty ledger.
+
+        Returns the archive path, e.g. `user_data.20250101-093000.csv`.
+        Caches that must remember archived stays read them back with
+        `read_archived`.
+        """
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        archive = sidecar_path(self.path, f"{stamp}.csv")
+        tmp = self.path + ".rotate"
+        with span("ledger.rotate"), self._locked_file() as fh:
+            header = self._header_for(fh)
+            with open(tmp, "wb") as out:
+                out.write(self._encode([header]))
+                _fsync(out)
+            os.link(self.path, archive)
+            os.replace(tmp, self.path)
+            self._header_generation = self._new_generation()["token"]
+        return archive
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["compact", "rotate"])
+    parser.add_argument("ledger")
+    args = parser.parse_args(argv)
+    ledger = GuestLedger(args.ledger)
+    if args.command == "compact":
+        ledger.compact()
+        print(f"compacted {ledger.path}")
+    else:
+        print(f"archived {ledger.path} to {ledger.rotate()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# pages/Reports.py – occupancy & revenue dashboard
+
+import datetime
+import pandas as pd
+import streamlit as st
+from columnar import ColumnarLedger
+from resources import aggregates as _aggregates, ledger as _ledger
+from rooms import ROOM_INVENTORY
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 1 · CONFIG & DATA
+# ─────────────────────────────────────────────────────────────────────────────
+
+TOTAL_ROOMS = sum(len(rooms) for rooms in ROOM_INVENTORY.values())
+
+# Typed Parquet mirror for per-period breakdowns the running totals don't keep
+@st.cache_resource(show_spinner="Loading Parquet mirror...")
+def _columnar():
+    return ColumnarLedger(_ledger())
+
+aggs = _aggregates()
+aggs.refresh()  # only folds in stays saved since the last visit
+store = _columnar()
+store.refresh()  # appends only the rows saved since the last visit
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 2 · UI
+# ─────────────────────────────────────────────────────────────────────────────
+
+st.title("📈 Occupancy & Revenue")
+
+today = datetime.date.today()
+c1, c2 = st.columns(2)
+with c1:
+    start = st.date_input("From", today - datetime.timedelta(days=30))
+with c2:
+    end = st.date_input("To (exclusive)", today + datetime.timedelta(days=1))
+
+daily = aggs.daily(start, end)
+nights = max((end - start).days, 1)
+room_nights = int(daily["Rooms"].sum())
+revenue = float(daily["Revenue"].sum())
+
+m1, m2, m3 = st.columns(3)
+m1.metric("Occupancy", f"{room_nights / (TOTAL_ROOMS * nights):.0%}")
+m2.metric("ADR", f"₹{revenue / room_nights:,.0f}" if room_nights else "–")
+m3.metric("Revenue", f"₹{revenue:,.0f}")
+
+st.subheader("🛏️ Daily occupancy")
+occupancy = daily.pivot_table(index="Date", columns="Room Type", values="Rooms",
+                              aggfunc="sum", fill_value=0)
+st.bar_chart(occupancy.reindex(pd.date_range(start, end, inclusive="left"), fill_value=0))
+
+st.subheader("💰 Daily revenue")
+st.line_chart(daily.groupby("Date")["Revenue"].sum())
+
+c1, c2 = st.columns(2)
+with c1:
+    st.subheader("By room type (all time)")
+    st.dataframe(aggs.by_room_type().style.format(
+        {"Revenue": "₹{:,.0f}", "ADR": "₹{:,.0f}"}
+    ))
+with c2:
+    st.subheader("By offer (all time)")
+    st.dataframe(aggs.by_discount().style.format({"Revenue": "₹{:,.0f}"}))
+
+st.subheader("🗓️ Stays checking in this period")
+c1, c2 = st.columns(2)
+with c1:
+    st.caption("Revenue by room type")
+    st.bar_chart(store.revenue_by_room_type(start, end))
+with c2:
+    st.caption("Offer uptake")
+    st.dataframe(store.discount_uptake(start, end).to_frame("Share").style.format("{:.0%}"))
@@ -0,0 +1,93 @@
+"""Timing spans for the registration flow.
+
+    with span("ledger.append", rows=1):
+        ...
+
+Each finished span goes into a fixed-size ring buffer (`TIMINGS`), which
+feeds the apps' debug panel and the benchmarks. It is also logged as one
+JSON line on the `oceano.perf` logger, e.g.
+
+    {"span": "sheets.append_rows", "ms": 412.7, "at": 1736931600.2, "rows": 3}
+
+Set `OCEANO_PERF_LOG=/path/perf.jsonl` to append those lines to a file.
+Spans that end in an exception carry `"error": "<ExceptionType>"`.
+"""
+
+import collections
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+logger = logging.getLogger("oceano.perf")
+
+
+class Timings:
+    """Ring buffer of the most recent `size` spans, shared by all threads."""
+
+    def __init__(self, size=5000):
+        self._spans = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, **fields):
+        entry = {"span": name, "ms": round(seconds * 1000, 3), "at": round(time.time(), 3), **fields}
+        with self._lock:
+            self._spans.append(entry)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(entry, default=str))
+        return entry
+
+    def recent(self, name=None, limit=None):
+        with self._lock:
+            spans = [s for s in self._spans if name is None or s["span"] == name]
+        return spans[-limit:] if limit else spans
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def summary(self):
+        """calls / p50 / p95 / max / last (ms) per span name."""
+        df = pd.DataFrame(self.recent(), columns=["span", "ms"])
+        if df.empty:
+            return pd.DataFrame(columns=["calls", "p50_ms", "p95_ms", "max_ms", "last_ms"])
+        ms = df.groupby("span", sort=True)["ms"]
+        return pd.DataFrame({
+            "calls": ms.size(),
+            "p50_ms": ms.quantile(0.5),
+            "p95_ms": ms.quantile(0.95),
+            "max_ms": ms.max(),
+            "last_ms": ms.last(),
+        }).round(3)
+
+
+TIMINGS = Timings()
+
+
+@contextlib.contextmanager
+def span(name, **fields):
+    """Time the block; fields added to the yielded dict are logged with it."""
+    start = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as e:
+        fields["error"] = type(e).__name__
+        raise
+    finally:
+        TIMINGS.record(name, time.perf_counter() - start, **fields)
+
+
+def log_to_file(path):
+    """Append every span to `path` as JSON lines."""
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+if os.environ.get("OCEANO_PERF_LOG") and not logger.handlers:
+    log_to_file(os.environ["OCEANO_PERF_LOG"])
@@ -0,0 +1,111 @@
+"""Room pricing rules shared by both apps and by ledger re-billing.
+
+A stay costs the nightly rate of its room type times the seasonal
+multiplier of every night, times the discount factor of the guest's offer.
+A rent entered at the desk is the final nightly charge: no seasonal
+multiplier, only the discount. `price_stay` prices one guest and
+`price_frame` applies the same rules to a whole dataframe at once. Both
+go through `daily_multipliers`, so a re-bill of the ledger matches what
+the desk charged.
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOM_RATES = {"Single": 1000.0, "Double": 1500.0, "Suite": 2500.0}
+
+DISCOUNT_OPTIONS = [
+    "5% Discount", "10% Discount", "15% Discount",
+    "Free Drink", "Free Dessert", "VIP Lounge Access",
+]
+# Only the percentage offers change the bill; the rest are perks
+DISCOUNT_FACTORS = {"5% Discount": 0.95, "10% Discount": 0.90, "15% Discount": 0.85}
+
+# (first (month, day), last (month, day), multiplier), inclusive, non-overlapping
+SEASONS = [
+    ((12, 20), (12, 31), 1.25),  # festive peak
+    ((1, 1), (1, 5), 1.25),
+    ((6, 1), (9, 30), 0.85),     # monsoon
+]
+
+_EPOCH = datetime.date(1970, 1, 1).toordinal()
+
+
+def daily_multipliers(first_day, last_day):
+    """Season multiplier of each day in [first_day, last_day).
+
+    Days are counted from 1970-01-01 (numpy `datetime64[D]` integers).
+    """
+    days = np.arange(first_day, last_day).astype("datetime64[D]")
+    months = days.astype("datetime64[M]")
+    code = (months.astype(int) % 12 + 1) * 100 + (days - months).astype(int) + 1
+    mult = np.ones(len(days))
+    for (m1, d1), (m2, d2), factor in SEASONS:
+        mult[(code >= m1 * 100 + d1) & (code <= m2 * 100 + d2)] = factor
+    return mult
+
+
+def _day(v):
+    if isinstance(v, datetime.datetime):
+        v = v.date()
+    if not isinstance(v, datetime.date):
+        v = datetime.date.fromisoformat(str(v)[:10])
+    return v.toordinal() - _EPOCH
+
+
+def price_stay(check_in, check_out, room_type, discount="", rent=None):
+    """Nightly rate, nights and total bill for one guest.
+
+    `rent` is the rate typed at the desk; 0 is a complimentary stay, and only
+    a missing rent (`None` / NaN) falls back to the room-type rate.
+    """
+    start, end = _day(check_in), _day(check_out)
+    nights = end - start
+    if rent is not None and not pd.isna(rent):
+        rate, charged_nights = float(rent), max(nights, 0)
+    else:
+        rate = ROOM_RATES.get(room_type, 0.0)
+        charged_nights = daily_multipliers(start, end).sum() if nights > 0 else 0.0
+    return {
+        "Room Rent": rate,
+        "Total Stay": nights,
+        "Total Bill": float(rate * charged_nights * DISCOUNT_FACTORS.get(discount, 1.0)),
+    }
+
+
+def price_frame(df):
+    """Vectorized `price_stay` over ledger-shaped rows.
+
+    Returns a frame with `Room Rent`, `Total Stay` and `Total Bill` aligned
+    to `df.index`. Rows with unparseable dates get NaN.
+    """
+    start = pd.to_datetime(df["Check-in Date"], errors="coerce").values.astype("datetime64[D]")
+    end = pd.to_datetime(df["Check-out Date"], errors="coerce").values.astype("datetime64[D]")
+    valid = ~(np.isnat(start) | np.isnat(end))
+    s, e = start.astype("int64"), end.astype("int64")
+
+    # Prefix sums of the daily multipliers turn every stay into two lookups
+    season_nights = np.zeros(len(df))
+    if valid.any():
+        lo = min(s[valid].min(), e[valid].min())
+        hi = max(s[valid].max(), e[valid].max())
+        s, e = np.where(valid, s, lo), np.where(valid, e, lo)
+        cum = np.concatenate([[0.0], np.cumsum(daily_multipliers(lo, hi))])
+        season_nights = np.where(e > s, cum[e - lo] - cum[s - lo], 0.0)
+
+    rate = df["Room Type"].map(ROOM_RATES).fillna(0.0).to_numpy(float)
+    if "Room Rent" in df:  # missing / blank ledger cells fall back to the type rate
+        rent = pd.to_numeric(df["Room Rent"], errors="coerce").to_numpy(float)
+        desk = ~np.isnan(rent)
+        rate = np.where(desk, rent, rate)
+        # A desk rate is final: every night counts once, whatever the season
+        season_nights = np.where(desk, np.maximum(e - s, 0), season_nights)
+    factor = np.ones(len(df))
+    if "Discount Applied" in df:
+        factor = df["Discount Applied"].map(DISCOUNT_FACTORS).fillna(1.0).to_numpy(float)
+
+    nights = np.where(valid, e - s, np.nan)
+    bill = np.where(valid, rate * season_nights * factor, np.nan)
+    return pd.DataFrame({"Room Rent": rate, "Total Stay": nights, "Total Bill": bill}, index=df.index)
@@ -0,0 +1,137 @@
+"""Speech recognizer backends for the voice pipeline.
+
+Every backend is a callable `sr.AudioData -> str` that raises the usual
+`sr.UnknownValueError` / `sr.RequestError`, so `VoicePipeline` and the
+form code don't care which one is in use. Each backend times its own calls
+so cloud and offline latency can be compared side by side.
+
+* `google` – `recognize_google`, one cloud round trip per field.
+* `vosk`   – offline Kaldi model, loaded once and kept warm
+             (needs `pip install vosk` and a model directory).
+* `stub`   – deterministic answers, for tests and benchmarks.
+"""
+
+import collections
+import json
+import os
+import threading
+import time
+
+import speech_recognition as sr
+
+VOSK_MODEL_PATH = os.environ.get("VOSK_MODEL_PATH", "model")
+
+
+class LatencyStats:
+    """Rolling call timings (seconds) for one backend."""
+
+    def __init__(self, window=200):
+        self.samples = collections.deque(maxlen=window)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+            self.calls += 1
+
+    def summary(self):
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return {"calls": self.calls, "p50_ms": None, "p95_ms": None, "last_ms": None}
+        pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+        return {
+            "calls": self.calls, "p50_ms": pick(0.5), "p95_ms": pick(0.95),
+            "last_ms": round(self.samples[-1] * 1000, 1),
+        }
+
+
+class Recognizer:
+    name = "base"
+
+    def __init__(self):
+        self.latency = LatencyStats()
+
+    def __call__(self, audio):
+        start = time.perf_counter()
+        try:
+            return self.recognize(audio)
+        finally:
+            self.latency.record(time.perf_counter() - start)
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+
+class GoogleRecognizer(Recognizer):
+    name = "google"
+
+    def recognize(self, audio):
+        return sr.Recognizer().recognize_google(audio)
+
+
+class VoskRecognizer(Recognizer):
+    """Offline recognizer; the model is loaded in `__init__` and reused."""
+
+    name = "vosk"
+    rate = 16000
+
+    def __init__(self, model_path=VOSK_MODEL_PATH):
+        super().__init__()
+        try:
+            import vosk
+        except ImportError as e:
+            raise sr.RequestError("offline recognition needs `pip install vosk`") from e
+        if not os.path.isdir(model_path):
+            raise sr.RequestError(f"Vosk model not found at {model_path!r}")
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model = vosk.Model(model_path)
+        self.warm()
+
+    def warm(self):
+        """Run half a second of silence through the decoder to page the model in."""
+        rec = self._vosk.KaldiRecognizer(self.model, self.rate)
+        rec.AcceptWaveform(b"\0\0" * (self.rate // 2))
+        rec.FinalResult()
+
+    def recognize(self, audio):
+        rec = self._vosk.KaldiRecognizer(self.model, self.rate)
+        rec.AcceptWaveform(audio.get_raw_data(convert_rate=self.rate, convert_width=2))
+        text = json.loads(rec.FinalResult()).get("text", "")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class StubRecognizer(Recognizer):
+    """Returns `replies` in order (cycling), or `text` when none are given."""
+
+    name = "stub"
+
+    def __init__(self, text="test", replies=None):
+        super().__init__()
+        self.text = text
+        self.replies = list(replies or [])
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def recognize(self, audio):
+        if not self.replies:
+            return self.text
+        with self._lock:
+            reply = self.replies[self._calls % len(self.replies)]
+            self._calls += 1
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+BACKENDS = {"google": GoogleRecognizer, "vosk": VoskRecognizer, "stub": StubRecognizer}
+
+
+def make_recognizer(name, **kwargs):
+    if name not in BACKENDS:
+        raise ValueError(f"unknown speech backend {name!r}; pick one of {sorted(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
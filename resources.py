@@ -0,0 +1,40 @@
+"""Ledger and caches shared by the desk apps and the Reports page.
+
+`st.cache_resource` caches per defining function, so a page that declared
+its own `GuestLedger` / `StayAggregates` got a second copy with its own
+lock, racing the app's copy on the same sidecar files. Everything that
+reads or writes `user_data.csv` gets its instance from here instead.
+"""
+
+import streamlit as st
+
+from aggregates import StayAggregates
+from guest_index import GuestIndex
+from ledger import GuestLedger
+from rooms import RoomAvailability
+
+CSV_FILE = "/Users/adityahemantshahane/Desktop/codes/user_data.csv"
+
+
+# Append-only ledger, opened (and repaired if needed) once per process
+@st.cache_resource(show_spinner=False)
+def ledger():
+    return GuestLedger(CSV_FILE)
+
+
+# Mobile / Aadhar → last known personal details, kept in step with the ledger
+@st.cache_resource(show_spinner="Indexing past guests...")
+def guest_index():
+    return GuestIndex(ledger())
+
+
+# Running occupancy / revenue totals for the Reports page
+@st.cache_resource(show_spinner="Building report aggregates...")
+def aggregates():
+    return StayAggregates(ledger())
+
+
+# Per-room booking calendars for availability and clash checks
+@st.cache_resource(show_spinner="Loading room bookings...")
+def rooms():
+    return RoomAvailability(ledger())
@@ -0,0 +1,177 @@
+"""Room inventory and availability.
+
+Bookings are kept per room, sorted by check-in day, together with a running
+maximum of check-out days. "Does [in, out) clash with anything in room R?"
+is then one binary search. "Which Suites are free?" is one search per
+room instead of a scan over every row of the ledger. The calendar is built
+from the ledger once and follows it with `read_since`, like the guest
+index.
+"""
+
+import bisect
+import datetime
+import itertools
+import threading
+
+from perf import span
+
+ROOM_TYPES = ["Single", "Double", "Suite"]
+
+# Rooms of each type; any room number seen in the ledger is added as well
+ROOM_INVENTORY = {
+    "Single": [str(n) for n in range(101, 111)],
+    "Double": [str(n) for n in range(201, 211)],
+    "Suite": [str(n) for n in range(301, 306)],
+}
+
+
+def day_number(v):
+    """Date / datetime / 'YYYY-MM-DD…' string → proleptic ordinal, else None."""
+    if isinstance(v, datetime.datetime):
+        return v.date().toordinal()
+    if isinstance(v, datetime.date):
+        return v.toordinal()
+    try:
+        return datetime.date.fromisoformat(str(v).strip()[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+class RoomCalendar:
+    """Half-open [check-in, check-out) stays of one room."""
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.max_end = []  # max_end[i] = max(ends[:i + 1])
+
+    def add(self, start, end):
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.max_end.insert(i, end)
+        running = self.max_end[i - 1] if i else end
+        for j in range(i, len(self.ends)):
+            running = max(running, self.ends[j])
+            self.max_end[j] = running
+
+    def extend(self, stays):
+        """Add many `(start, end)` stays with one sort instead of one insert each."""
+        merged = sorted(itertools.chain(zip(self.starts, self.ends), stays), key=lambda s: s[0])
+        self.starts = [s for s, _ in merged]
+        self.ends = [e for _, e in merged]
+        self.max_end = list(itertools.accumulate(self.ends, max))
+
+    def overlaps(self, start, end):
+        """True if any stay starts before `end` and ends after `start`."""
+        i = bisect.bisect_left(self.starts, end)
+        return i > 0 and self.max_end[i - 1] > start
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class RoomAvailability:
+    """Availability of every room, kept in step with the ledger."""
+
+    def __init__(self, ledger, inventory=ROOM_INVENTORY):
+        self.ledger = ledger
+        self.inventory = {t: list(rooms) for t, rooms in inventory.items()}
+        self._room_type = {r: t for t, rooms in self.inventory.items() for r in rooms}
+        self._lock = threading.RLock()
+        self._reset()
+        self.refresh()
+
+    def _reset(self):
+        self.generation = self.ledger.generation()
+        self.offset = 0
+        self.calendars = {}
+        # Stays moved to an archive by `rotate` still hold their rooms
+        today = datetime.date.today().toordinal()
+        self._load([row for row in self.ledger.read_archived()
+                    if (day_number(row.get("Check-out Date")) or 0) > today])
+
+    def _add_room(self, room, room_type):
+        if room not in self._room_type and room_type in self.inventory:
+            self.inventory[room_type].append(room)
+            self._room_type[room] = room_type
+
+    @staticmethod
+    def _stay(room, check_in, check_out):
+        start, end = day_number(check_in), day_number(check_out)
+        room = str(room).strip()
+        if not room or start is None or end is None or end <= start:
+            return None
+        return room, start, end
+
+    def book(self, room, room_type, check_in, check_out):
+        stay = self._stay(room, check_in, check_out)
+        if stay is None:
+            return
+        room, start, end = stay
+        with self._lock:
+            self._add_room(room, room_type)
+            self.calendars.setdefault(room, RoomCalendar()).add(start, end)
+
+    def _load(self, rows):
+        """Startup / catch-up: group by room and merge each calendar once."""
+        by_room = {}
+        for row in rows:
+            stay = self._stay(row.get("Room Number"), row.get("Check-in Date"),
+                              row.get("Check-out Date"))
+            if stay is not None:
+                self._add_room(stay[0], row.get("Room Type"))
+                by_room.setdefault(stay[0], []).append(stay[1:])
+        for room, stays in by_room.items():
+            self.calendars.setdefault(room, RoomCalendar()).extend(stays)
+
+    def refresh(self):
+        """Pick up stays saved since the last call (by any terminal)."""
+        with self._lock, span("rooms.refresh"):
+            if self.ledger.generation() != self.generation:  # compacted / rotated
+                self._reset()
+            rows, self.offset = self.ledger.read_since(self.offset)
+            if len(rows) == 1:
+                row = rows[0]
+                self.book(row.get("Room Number"), row.get("Room Type"),
+                          row.get("Check-in Date"), row.get("Check-out Date"))
+            else:
+                self._load(rows)
+
+    def conflicts(self, room, check_in, check_out):
+        start, end = day_number(check_in), day_number(check_out)
+        if start is None or end is None or end <= start:
+            return False
+        with self._lock:  # `extend` swaps a calendar's lists one at a time
+            cal = self.calendars.get(str(room).strip())
+            return cal is not None and cal.overlaps(start, end)
+
+    def reserve(self, row):
+        """Append `row` to the ledger unless its room is taken; True if saved.
+
+        The catch-up and the clash check run under the ledger's write lock,
+        so two terminals can never both book a room for overlapping dates.
+        A row without a room number, or whose check-out is not after its
+        check-in, is refused.
+        """
+        stay = self._stay(row.get("Room Number"), row.get("Check-in Date"),
+                          row.get("Check-out Date"))
+        if stay is None:
+            return False
+        room, start, end = stay
+
+        def still_free():
+            self.refresh()
+            with self._lock:
+                cal = self.calendars.get(room)
+                return cal is None or not cal.overlaps(start, end)
+
+        # Same lock order as `refresh`: this object first, then the ledger file
+        with self._lock:
+            return self.ledger.append_if(row, still_free) is not None
+
+    def free_rooms(self, room_type, check_in, check_out):
+        """Rooms of `room_type` with no stay overlapping [check_in, check_out)."""
+        with self._lock:
+            return [r for r in self.inventory.get(room_type, [])
+                    if not self.conflicts(r, check_in, check_out)]
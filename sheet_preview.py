@@ -0,0 +1,67 @@
+"""Cached, incremental preview of the guest sheet.
+
+Streamlit reruns the script on every keystroke, so the preview must not
+download the whole sheet each time. `SheetPreview` keeps the rows it has
+already seen, re-checks the sheet at most once per TTL (or right after one
+of our own writes) and then only fetches the rows appended since, with one
+open-ended range request whose size does not depend on the sheet's length.
+"""
+
+import threading
+import time
+
+import pandas as pd
+
+from perf import span
+from sheets_sync import LAST_COLUMN
+
+
+def paginate(df, page, page_size):
+    """Rows of 1-based `page`; the dataframe widget only ever gets one page."""
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
+
+
+def page_count(df, page_size):
+    return max(1, -(-len(df) // page_size))
+
+
+class SheetPreview:
+    """Row cache for a worksheet; `worksheet` is a zero-argument callable."""
+
+    def __init__(self, worksheet, ttl=60.0):
+        self.worksheet = worksheet
+        self.ttl = ttl
+        self._rows = []
+        self._frame = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self, *_):
+        """Force a (delta) refresh on the next read – call after writing."""
+        self._checked = 0.0
+
+    def _refresh(self):
+        ws = self.worksheet()
+        known = len(self._rows)
+        with span("sheets.preview_fetch") as fields:
+            # Open-ended range: only rows past the ones we have come back
+            new = ws.get(f"A{known + 1}:{LAST_COLUMN}")
+            if not new:
+                return
+            self._rows = self._rows + [list(r) for r in new]
+            fields["rows"] = len(new)
+        self._frame = None
+
+    def frame(self):
+        with self._lock:
+            if time.monotonic() - self._checked > self.ttl:
+                self._refresh()
+                self._checked = time.monotonic()
+            if self._frame is None:
+                header, body = (self._rows[0], self._rows[1:]) if self._rows else ([], [])
+                width = len(header)
+                self._frame = pd.DataFrame(
+                    [(r + [""] * width)[:width] for r in body], columns=header
+                )
+            return self._frame
@@ -0,0 +1,434 @@
+"""Write-behind Google Sheets sync.
+
+The save button only appends the row to a durable local outbox (a JSONL file
+next to the ledger) and returns. A background worker drains the outbox in
+order with batched `append_rows`, retrying with exponential backoff, and
+records what it has pushed so rows are neither lost nor sent twice.
+"""
+
+import datetime
+import json
+import numbers
+import os
+import random
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from ledger import open_locked, read_json, write_json
+from perf import span
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 1 · UTILITY – convert cells to JSON-safe values
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Header row of the Google Sheet (the ledger also stores "Discount Applied")
+SHEET_COLUMNS = [
+    "Date & Time", "Name", "Mobile Number", "Aadhar Card Number", "Age",
+    "Nationality", "Address", "Check-in Date", "Check-out Date",
+    "Room Number", "Room Type", "Room Rent", "Total Stay", "Total Bill"
+]
+LAST_COLUMN = chr(ord("A") + len(SHEET_COLUMNS) - 1)  # "N"
+
+
+def to_sheet(v):
+    if pd.isna(v):
+        return ""
+    if isinstance(v, (datetime.date, datetime.datetime, pd.Timestamp)):
+        return v.strftime("%Y-%m-%d")
+    if isinstance(v, (numbers.Integral, np.integer)):
+        return int(v)
+    if isinstance(v, (numbers.Real, np.floating)):
+        return float(v)
+    return str(v)
+
+
+def cell_text(v):
+    """A cell as the sheet shows it back, for comparing sent and stored rows.
+
+    USER_ENTERED turns "2000.0" into 2000, so numbers compare by value.
+    """
+    s = str(v).strip()
+    try:
+        return repr(float(s))
+    except ValueError:
+        return s
+
+
+def row_text(row):
+    """`cell_text` of each cell, without the trailing blanks Sheets drops."""
+    cells = [cell_text(v) for v in row]
+    while cells and cells[-1] == "":
+        cells.pop()
+    return cells
+
+
+def sheet_frame(df):
+    """`to_sheet` applied to a whole dataframe, one column at a time.
+
+    Returns an object frame of "", str, int and float values. Only columns
+    with genuinely mixed contents fall back to the per-cell `to_sheet`.
+    """
+    out = {}
+    for col, s in df.items():
+        missing = s.isna()
+        kind = pd.api.types.infer_dtype(s, skipna=True)
+        if pd.api.types.is_bool_dtype(s.dtype):
+            v = s.astype(int).astype(object)
+        elif pd.api.types.is_integer_dtype(s.dtype):
+            v = s.astype(object)
+        elif pd.api.types.is_float_dtype(s.dtype):
+            v = s.astype(object)
+        elif kind in ("datetime64", "datetime", "date"):
+            v = pd.to_datetime(s, errors="coerce").dt.strftime("%Y-%m-%d")
+        elif kind in ("string", "empty"):
+            v = s
+        else:
+            out[col] = s.map(to_sheet)
+            continue
+        out[col] = v.astype(object).where(~missing, "")
+    return pd.DataFrame(out, index=df.index, columns=df.columns)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 2 · LAZY WORKSHEET HANDLE
+# ─────────────────────────────────────────────────────────────────────────────
+
+class LazyWorksheet:
+    """Opens the worksheet on first use and keeps the handle for the process.
+
+    `opener` does the slow part (auth, `open_by_url`, header check). A failed
+    open is not remembered, so the next call simply tries again.
+    `connect_seconds` is `None` until the first successful open.
+    """
+
+    def __init__(self, opener):
+        self.opener = opener
+        self.connect_seconds = None
+        self._ws = None
+        self._lock = threading.Lock()
+
+    @property
+    def connected(self):
+        return self._ws is not None
+
+    def __call__(self):
+        if self._ws is None:
+            with self._lock:
+                if self._ws is None:
+                    start = time.perf_counter()
+                    with span("sheets.connect"):
+                        self._ws = self.opener()
+                    self.connect_seconds = time.perf_counter() - start
+        return self._ws
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 3 · OUTBOX
+# ─────────────────────────────────────────────────────────────────────────────
+
+class Outbox:
+    """Durable FIFO of sheet rows.
+
+    Rows live in `path` (one JSON list per line); `path.cursor` records the
+    byte offset up to which rows are known to be in the sheet. The cursor is
+    tied to the outbox file's inode, so recycling the drained file can never
+    make the worker skip or replay rows.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.cursor_path = path + ".cursor"
+        self.inflight_path = path + ".inflight"
+        self.prev_path = path + ".prev"
+        open(self.path, "ab").close()
+
+    def _inode(self):
+        return os.stat(self.path).st_ino
+
+    def put(self, row):
+        self.put_many([row])
+
+    @staticmethod
+    def _encode(rows):
+        return "".join(json.dumps(r) + "\n" for r in rows).encode("utf-8")
+
+    def put_many(self, rows):
+        data = self._encode(rows)
+        with open_locked(self.path) as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def tail(self):
+        """`(inode, size)` of the outbox file: where the next `put_many` lands."""
+        with open_locked(self.path) as fh:
+            return os.fstat(fh.fileno()).st_ino, fh.seek(0, os.SEEK_END)
+
+    def holds(self, inode, offset, rows):
+        """Were `rows` queued by one `put_many` after `tail()` returned `(inode, offset)`?
+
+        Lets a resumed bulk import tell whether its last put went through,
+        even if the worker has since drained and recycled that file (the
+        last drained file is kept as `.prev`).
+        """
+        data = self._encode(rows)
+        with open_locked(self.path) as fh:
+            if os.fstat(fh.fileno()).st_ino == inode:
+                fh.seek(offset)
+                return data in fh.read()
+        try:
+            with open(self.prev_path, "rb") as fh:
+                if os.fstat(fh.fileno()).st_ino == inode:
+                    fh.seek(offset)
+                    return data in fh.read()
+        except FileNotFoundError:
+            pass
+        return False
+
+    def draining(self):
+        """Exclusive lock held while sending, in case several processes share the outbox."""
+        return open_locked(self.path + ".lock")
+
+    def offset(self):
+        cur = read_json(self.cursor_path) or {}
+        return cur.get("offset", 0) if cur.get("inode") == self._inode() else 0
+
+    def peek(self, max_rows):
+        """Oldest unsent rows (at most `max_rows`) and the offset just past them."""
+        start = self.offset()
+        rows = []
+        with open(self.path, "rb") as fh:
+            fh.seek(start)
+            end = start
+            for line in fh:
+                if not line.endswith(b"\n") or len(rows) >= max_rows:
+                    break
+                rows.append(json.loads(line))
+                end += len(line)
+        return rows, end
+
+    def pending(self):
+        with open(self.path, "rb") as fh:
+            fh.seek(self.offset())
+            return sum(1 for line in fh if line.endswith(b"\n"))
+
+    def commit(self, end):
+        """Mark everything before byte `end` as delivered."""
+        with open_locked(self.path) as fh:
+            inode = os.fstat(fh.fileno()).st_ino
+            if end < fh.seek(0, os.SEEK_END):
+                write_json(self.cursor_path, {"inode": inode, "offset": end})
+                return
+            # Fully drained: swap in an empty file rather than truncating, so
+            # a crash before the cursor write still can't misplace new rows.
+            # The drained file stays behind as `.prev` for `holds`.
+            tmp = self.path + ".new"
+            open(tmp, "wb").close()
+            try:
+                os.remove(self.prev_path)
+            except FileNotFoundError:
+                pass
+            os.link(self.path, self.prev_path)
+            os.replace(tmp, self.path)
+            write_json(self.cursor_path, {"inode": self._inode(), "offset": 0})
+
+    # ── in-flight marker (exactly-once across crashes) ──────────────────────
+
+    def mark_inflight(self, rows, end, sheet_rows):
+        """Record a batch before sending it: its rows and the sheet's length."""
+        write_json(self.inflight_path, {
+            "inode": self._inode(), "end": end, "sheet_rows": sheet_rows,
+            "rows": [[cell_text(v) for v in r] for r in rows],
+        })
+
+    def inflight(self):
+        mark = read_json(self.inflight_path)
+        if mark and mark.get("inode") == self._inode() and mark["end"] > self.offset():
+            return mark
+        return None
+
+    def clear_inflight(self):
+        try:
+            os.remove(self.inflight_path)
+        except FileNotFoundError:
+            pass
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 4 · WORKER
+# ─────────────────────────────────────────────────────────────────────────────
+
+class SheetSyncWorker(threading.Thread):
+    """Background thread that drains an `Outbox` into a worksheet.
+
+    `worksheet` is a zero-argument callable so that connecting to Google
+    happens on this thread, on first use, and is retried like any other error.
+    `max_per_minute` spaces out `append_rows` calls to stay under the Sheets
+    write quota (bulk imports); `None` sends as fast as rows arrive.
+    """
+
+    def __init__(self, outbox, worksheet, batch_size=200, base_delay=1.0,
+                 max_delay=60.0, poll_interval=5.0, on_flush=None,
+                 max_per_minute=None):
+        super().__init__(name="sheet-sync", daemon=True)
+        self.outbox = outbox
+        self.worksheet = worksheet
+        self.batch_size = batch_size
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.on_flush = on_flush
+        self.max_per_minute = max_per_minute
+        self.failures = 0
+        self.last_error = None
+        self.pushed = 0
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._recovered = False
+        self._sheet_rows = 0  # sheet length as of the last recovery / append
+        self._next_call = 0.0
+
+    def notify(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                while self.flush_once():
+                    pass
+                self.failures, self.last_error = 0, None
+            except Exception as e:
+                self.failures += 1
+                self.last_error = e
+                # The failed call may still have reached the sheet (timeout or
+                # 5xx after commit): check its tail again before resending
+                self._recovered = False
+                self._stopping.wait(self.backoff())
+                self._wake.set()
+
+    def backoff(self):
+        delay = min(self.max_delay, self.base_delay * 2 ** (self.failures - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _throttle(self):
+        if not self.max_per_minute:
+            return
+        wait = self._next_call - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._next_call = max(self._next_call, time.monotonic()) + 60.0 / self.max_per_minute
+
+    def _recover(self, ws):
+        """Settle a batch that was in flight when the last call failed or the process died.
+
+        The batch counts as delivered only if the sheet grew by exactly its
+        size and the new tail matches it row for row; rows sharing a
+        timestamp with the tail must not be taken for ours. Otherwise it is
+        sent again.
+        """
+        total = len(ws.col_values(1))
+        mark = self.outbox.inflight()
+        if mark and "rows" in mark:
+            before, sent = mark["sheet_rows"], mark["rows"]
+            if total == before + len(sent):
+                tail = ws.get(f"A{before + 1}:{LAST_COLUMN}{total}") if sent else []
+                if [row_text(r) for r in tail] == [row_text(r) for r in sent]:
+                    self.outbox.commit(mark["end"])
+        self.outbox.clear_inflight()
+        self._sheet_rows = total
+        self._recovered = True
+
+    def _appended(self, response, count):
+        """Sheet length after a successful append, from the API response if present."""
+        rng = (response or {}).get("updates", {}).get("updatedRange", "") \
+            if isinstance(response, dict) else ""
+        last = re.search(r"(\d+)$", rng)
+        self._sheet_rows = int(last.group(1)) if last else self._sheet_rows + count
+
+    def flush_once(self):
+        """Push one batch; returns the number of rows sent (0 when idle)."""
+        with self.outbox.draining():
+            rows, end = self.outbox.peek(self.batch_size)
+            if not rows:
+                return 0
+            ws = self.worksheet()
+            if not self._recovered:
+                self._recover(ws)
+                rows, end = self.outbox.peek(self.batch_size)
+                if not rows:
+                    return 0
+            self.outbox.mark_inflight(rows, end, self._sheet_rows)
+            self._throttle()
+            with span("sheets.append_rows", rows=len(rows)):
+                response = ws.append_rows(rows, value_input_option="USER_ENTERED")
+            self._appended(response, len(rows))
+            self.outbox.commit(end)
+            self.outbox.clear_inflight()
+        self.pushed += len(rows)
+        if self.on_flush:
+            self.on_flush(len(rows))
+        return len(rows)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 5 · FAKE WORKSHEET – local stand-in for tests and benchmarks
+# ─────────────────────────────────────────────────────────────────────────────
+
+class FakeWorksheet:
+    """Just enough of `gspread.Worksheet` for the sync worker and previews.
+
+    Queue exceptions in `errors` to make the next calls fail; `latency`
+    simulates the network round trip of each call.
+    """
+
+    def __init__(self, rows=None, latency=0.0):
+        self.rows = [list(r) for r in rows or []]
+        self.latency = latency
+        self.errors = []
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _call(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.errors:
+            raise self.errors.pop(0)
+
+    def append_rows(self, values, value_input_option=None):
+        with self._lock:
+            self._call()
+            self.rows.extend(list(r) for r in values)
+
+    def append_row(self, values, value_input_option=None):
+        self.append_rows([values], value_input_option)
+
+    def get_all_values(self):
+        with self._lock:
+            self._call()
+            return [[str(v) for v in r] for r in self.rows]
+
+    def col_values(self, col):
+        with self._lock:
+            self._call()
+            return [str(r[col - 1]) if len(r) >= col else "" for r in self.rows]
+
+    def row_values(self, row):
+        with self._lock:
+            self._call()
+            return [str(v) for v in self.rows[row - 1]] if len(self.rows) >= row else []
+
+    def get(self, range_name):
+        """Row ranges (`"5:10"`) or open-ended A1 ranges (`"A5:N"`), as used
+        by the sheet preview. Column letters are ignored."""
+        first, last = (re.sub(r"[A-Z]", "", x) for x in range_name.split(":"))
+        first, last = int(first), int(last) if last else None
+        with self._lock:
+            self._call()
+            return [[str(v) for v in r] for r in self.rows[first - 1:last]]
@@ -29,9 +29,10 @@
 
 
 import datetime, re, streamlit as st, pandas as pd
-from streamlit_gsheets import GSheetsConnection
 import gspread
 from google.oauth2.service_account import Credentials
+from sheet_preview import SheetPreview, page_count, paginate
+from sheets_sync import LazyWorksheet
 
 # ------------------------------------------------------------------
 # 1  read secrets ----------------------------------------------------
@@ -41,23 +42,22 @@ SPREADSHEET_URL = svc_info["spreadsheet"]
 SPREADSHEET_ID  = re.search(r"/d/([a-zA-Z0-9_-]+)", SPREADSHEET_URL).group(1)
 
 # ------------------------------------------------------------------
-# 2  create two helpers ---------------------------------------------
-@st.cache_resource(show_spinner=False)
-def _gsheets_conn():
-    return st.connection("gsheets", type=GSheetsConnection)
-
-@st.cache_resource(show_spinner=False)
-def _gspread_client():
+# 2  lazy worksheet + cached preview --------------------------------
+def _open_wks():
     scopes = [
         "https://www.googleapis.com/auth/spreadsheets",
         "https://www.googleapis.com/auth/drive",
     ]
     creds = Credentials.from_service_account_info(svc_info, scopes=scopes)
-    return gspread.authorize(creds)
+    return gspread.authorize(creds).open_by_key(SPREADSHEET_ID).sheet1  # first tab
 
-conn     = _gsheets_conn()
-gclient  = _gspread_client()
-wks      = gclient.open_by_key(SPREADSHEET_ID).sheet1   # first tab
+@st.cache_resource(show_spinner=False)
+def _wks():
+    return LazyWorksheet(_open_wks)                     # opened on first use
+
+@st.cache_resource(show_spinner=False)
+def _preview():
+    return SheetPreview(_wks(), ttl=60)                 # cached rows
 
 # ------------------------------------------------------------------
 # 3  UI --------------------------------------------------------------
@@ -67,13 +67,17 @@ name = st.text_input("Enter your name")
 
 if st.button("💾 Save") and name.strip():
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    wks.append_row([timestamp, name.strip()])           # << no overwrite
+    _wks()().append_row([timestamp, name.strip()])      # << no overwrite
+    _preview().invalidate()
     st.success("Saved ✔️")
 
 # ------------------------------------------------------------------
 # 4  (optional) preview sheet ---------------------------------------
 with st.expander("📄 Current sheet data"):
     try:
-        st.dataframe(conn.read())                       # only READS
+        df = _preview().frame()                         # only READS new rows
+        pages = page_count(df, 50)
+        page = st.number_input("Page", 1, pages, pages)
+        st.dataframe(paginate(df, page, 50))
     except Exception as e:
         st.warning(f"Cannot read sheet yet: {e}")
\ No newline at end of file
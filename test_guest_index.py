@@ -0,0 +1,49 @@
+"""Returning-guest lookup keys and autofill."""
+
+import pytest
+
+from guest_index import GuestIndex, lookup_keys
+from ledger import GuestLedger
+
+
+@pytest.mark.parametrize("typed, keys", [
+    ("9876543210", ["m:9876543210"]),
+    ("98765 43210", ["m:9876543210"]),
+    ("09876543210", ["m:9876543210"]),
+    ("+91 98765 43210", ["m:9876543210"]),
+    ("+919876543210", ["m:9876543210"]),
+    ("9876543210.0", ["m:9876543210"]),
+    ("129876543210", ["a:129876543210"]),
+    ("1298 7654 3210", ["a:129876543210"]),
+    ("919876543210", ["a:919876543210"]),
+    ("98765", []),
+    ("", []),
+])
+def test_lookup_keys(typed, keys):
+    assert lookup_keys(typed) == keys
+
+
+@pytest.fixture
+def index(tmp_path):
+    ledger = GuestLedger(str(tmp_path / "user_data.csv"))
+    ledger.append_many([
+        {"Name": "Asha", "Mobile Number": "9876543210", "Aadhar Card Number": "111122223333"},
+        {"Name": "Ravi", "Mobile Number": "9000000001", "Aadhar Card Number": "129876543210"},
+    ])
+    return GuestIndex(ledger)
+
+
+@pytest.mark.parametrize("typed, name", [
+    ("9876543210", "Asha"),
+    ("+91 98765 43210", "Asha"),
+    ("111122223333", "Asha"),
+    # Ravi's Aadhar ends in Asha's mobile number: must not autofill Asha
+    ("129876543210", "Ravi"),
+    ("09000000001", "Ravi"),
+])
+def test_lookup_finds_the_right_guest(index, typed, name):
+    assert index.lookup(typed)["Name"] == name
+
+
+def test_unknown_aadhar_does_not_fall_back_to_mobile(index):
+    assert index.lookup("999876543210") is None
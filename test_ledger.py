@@ -0,0 +1,91 @@
+"""Append-only guest ledger: repair, compaction, rotation."""
+
+import csv
+
+import pytest
+
+from aggregates import StayAggregates
+from guest_index import GuestIndex
+from ledger import LEDGER_COLUMNS, GuestLedger
+
+
+def guest(name, room="101", mobile="9876543210", check_in="2030-01-01", check_out="2030-01-03"):
+    return {"Name": name, "Mobile Number": mobile, "Room Number": room, "Room Type": "Single",
+            "Check-in Date": check_in, "Check-out Date": check_out, "Total Bill": "2000"}
+
+
+def read_rows(path):
+    with open(path, newline="") as fh:
+        return list(csv.DictReader(fh))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "user_data.csv")
+
+
+def test_torn_tail_is_repaired(path):
+    ledger = GuestLedger(path)
+    ledger.append(guest("Asha"))
+    with open(path, "ab") as fh:
+        fh.write(b"2030-01-01 10:00:00,Rav")  # crash mid-append
+    ledger = GuestLedger(path)
+    assert open(path, "rb").read().endswith(b"\n")
+    ledger.append(guest("Ravi"))
+    assert [r["Name"] for r in read_rows(path)] == ["Asha", "Ravi"]
+
+
+def test_compact_reorder_while_another_instance_appends(path):
+    old = list(LEDGER_COLUMNS)
+    i, j = old.index("Check-out Date"), old.index("Room Number")
+    old[i], old[j] = old[j], old[i]
+    with open(path, "w") as fh:
+        fh.write(",".join(old) + "\n")
+    desk, maintenance = GuestLedger(path), GuestLedger(path)
+    desk.append(guest("Asha", room="101"))
+    maintenance.compact()
+    desk.append(guest("Ravi", room="102"))
+    rows = read_rows(path)
+    assert list(rows[0]) == LEDGER_COLUMNS
+    assert [(r["Room Number"], r["Check-out Date"]) for r in rows] == \
+        [("101", "2030-01-03"), ("102", "2030-01-03")]
+    assert [r["Room Number"] for r in desk.read_since(0)[0]] == ["101", "102"]
+
+
+def test_generation_changes_on_every_compaction(path):
+    ledger = GuestLedger(path)
+    seen = {ledger.generation()}
+    for _ in range(4):
+        ledger.compact()
+        seen.add(ledger.generation())
+    assert len(seen) == 5
+
+
+def test_caches_catch_up_after_repeated_compaction(path):
+    ledger = GuestLedger(path)
+    ledger.append(guest("Asha"))
+    with open(path, "a") as fh:
+        fh.write("a,hand-edited,line\n")
+    StayAggregates(ledger), GuestIndex(ledger)  # sidecars written, apps go down
+    ledger.compact()
+    ledger.compact()
+    ledger.append(guest("Ravi", mobile="9123456780"))
+    ledger = GuestLedger(path)  # restart
+    assert GuestIndex(ledger).lookup("9123456780")["Name"] == "Ravi"
+    assert StayAggregates(ledger).by_room_type().loc["Single", "Stays"] == 2
+
+
+def test_read_since_across_rotate(path):
+    ledger = GuestLedger(path)
+    ledger.append_many([guest("Asha"), guest("Ravi")])
+    rows, offset = ledger.read_since(0)
+    assert len(rows) == 2
+    generation = ledger.generation()
+    ledger.rotate()
+    assert ledger.generation() != generation
+    rows, start = ledger.read_since(0)
+    assert rows == [] and start < offset  # the new file holds only the header
+    ledger.append(guest("Meera"))
+    rows, _ = ledger.read_since(0)
+    assert [r["Name"] for r in rows] == ["Meera"]
+    assert [r["Name"] for r in ledger.read_archived()] == ["Asha", "Ravi"]
@@ -0,0 +1,88 @@
+"""Room calendars, availability and atomic reservations."""
+
+import multiprocessing
+import random
+
+import pytest
+
+from ledger import GuestLedger
+from rooms import RoomAvailability, RoomCalendar
+
+
+def stay(room, check_in, check_out, name="Asha"):
+    return {"Name": name, "Room Number": room, "Room Type": "Single",
+            "Check-in Date": check_in, "Check-out Date": check_out}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "user_data.csv")
+
+
+@pytest.fixture
+def rooms(path):
+    return RoomAvailability(GuestLedger(path))
+
+
+def test_extend_matches_one_by_one_add():
+    rng = random.Random(7)
+    stays = [(s, s + rng.randint(1, 9)) for s in (rng.randint(0, 400) for _ in range(300))]
+    one, bulk = RoomCalendar(), RoomCalendar()
+    for s, e in stays[:100]:
+        one.add(s, e)
+    bulk.extend(stays[:100])
+    for s, e in stays[100:]:
+        one.add(s, e)
+    bulk.extend(stays[100:])
+    assert one.max_end == bulk.max_end
+    assert sorted(zip(one.starts, one.ends)) == sorted(zip(bulk.starts, bulk.ends))
+    for s in range(0, 420, 3):
+        assert one.overlaps(s, s + 2) == bulk.overlaps(s, s + 2)
+
+
+def test_stays_are_half_open():
+    cal = RoomCalendar()
+    cal.add(10, 12)
+    assert cal.overlaps(11, 13)
+    assert not cal.overlaps(12, 14)  # check-in on the day of check-out
+    assert not cal.overlaps(8, 10)
+
+
+def test_free_rooms(rooms):
+    assert rooms.reserve(stay("101", "2030-01-01", "2030-01-05"))
+    rooms.refresh()
+    free = rooms.free_rooms("Single", "2030-01-03", "2030-01-04")
+    assert "101" not in free and "102" in free
+    assert "101" in rooms.free_rooms("Single", "2030-01-05", "2030-01-06")
+
+
+@pytest.mark.parametrize("row", [
+    stay("101", "2030-01-02", "2030-01-04"),  # overlaps
+    stay("", "2030-02-01", "2030-02-02"),     # no room
+    stay("102", "2030-01-02", "2030-01-02"),  # zero nights
+    stay("102", "2030-01-05", "2030-01-02"),  # check-out before check-in
+])
+def test_reserve_refuses(rooms, path, row):
+    assert rooms.reserve(stay("101", "2030-01-01", "2030-01-03"))
+    assert not rooms.reserve(row)
+    assert len(GuestLedger(path).read_since(0)[0]) == 1
+
+
+def test_reserve_catches_up_under_the_lock(path, rooms):
+    other_terminal = RoomAvailability(GuestLedger(path))
+    assert other_terminal.reserve(stay("101", "2030-01-01", "2030-01-03", name="Ravi"))
+    # `rooms` has not refreshed; the check inside reserve must still see Ravi
+    assert not rooms.reserve(stay("101", "2030-01-02", "2030-01-04"))
+    assert rooms.reserve(stay("101", "2030-01-03", "2030-01-04"))
+
+
+def _reserve_in_process(path, name):
+    return RoomAvailability(GuestLedger(path)).reserve(stay("101", "2030-01-01", "2030-01-03", name))
+
+
+def test_only_one_of_many_processes_wins(path):
+    GuestLedger(path)
+    with multiprocessing.Pool(8) as pool:
+        won = pool.starmap(_reserve_in_process, [(path, f"guest {i}") for i in range(8)])
+    assert sorted(won) == [False] * 7 + [True]
+    assert len(GuestLedger(path).read_since(0)[0]) == 1
@@ -0,0 +1,148 @@
+"""Outbox and sheet sync worker against `FakeWorksheet`."""
+
+import os
+
+import pytest
+
+from sheets_sync import FakeWorksheet, Outbox, SheetSyncWorker
+
+
+class CommitThenFail(FakeWorksheet):
+    """Applies the next `append_rows`, then raises – a timeout after commit."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail_after_write = 0
+
+    def append_rows(self, values, value_input_option=None):
+        super().append_rows(values, value_input_option)
+        if self.fail_after_write:
+            self.fail_after_write -= 1
+            raise TimeoutError("response lost")
+
+
+def rows(first, last):
+    return [[f"2025-01-01 10:00:{i:02d}", f"guest {i}"] for i in range(first, last)]
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(str(tmp_path / "outbox.jsonl"))
+
+
+def drain(worker, attempts=10):
+    """`run()` without the thread: flush, and on error mark for recovery."""
+    for _ in range(attempts):
+        try:
+            while worker.flush_once():
+                pass
+            return
+        except Exception:
+            worker._recovered = False
+    raise AssertionError("outbox never drained")
+
+
+def test_outbox_is_fifo_across_batches(outbox):
+    outbox.put_many(rows(0, 5))
+    first, end = outbox.peek(3)
+    assert first == rows(0, 3)
+    outbox.commit(end)
+    assert outbox.pending() == 2
+    rest, end = outbox.peek(10)
+    assert rest == rows(3, 5)
+
+
+def test_drained_outbox_is_recycled(outbox):
+    outbox.put_many(rows(0, 2))
+    inode = os.stat(outbox.path).st_ino
+    outbox.commit(outbox.peek(10)[1])
+    assert os.path.getsize(outbox.path) == 0
+    assert os.stat(outbox.path).st_ino != inode
+    outbox.put(rows(2, 3)[0])
+    assert outbox.peek(10)[0] == rows(2, 3)
+
+
+def test_holds_finds_a_put_after_recycling(outbox):
+    outbox.put_many(rows(0, 2))
+    inode, size = outbox.tail()
+    assert not outbox.holds(inode, size, rows(2, 4))
+    outbox.put_many(rows(2, 4))
+    assert outbox.holds(inode, size, rows(2, 4))
+    outbox.commit(outbox.peek(10)[1])  # drained and recycled
+    assert outbox.holds(inode, size, rows(2, 4))
+    assert not outbox.holds(inode, size, rows(4, 6))
+
+
+def test_worker_keeps_order(outbox):
+    ws = FakeWorksheet()
+    outbox.put_many(rows(0, 7))
+    drain(SheetSyncWorker(outbox, lambda: ws, batch_size=3))
+    assert ws.rows == rows(0, 7)
+    assert ws.calls == 4  # one length check, then three appends
+    assert outbox.pending() == 0
+
+
+def test_failed_append_is_retried(outbox):
+    ws = FakeWorksheet()
+    ws.errors = [ConnectionError("offline"), ConnectionError("offline")]
+    outbox.put_many(rows(0, 4))
+    drain(SheetSyncWorker(outbox, lambda: ws, batch_size=2))
+    assert ws.rows == rows(0, 4)
+
+
+def test_append_applied_before_error_is_not_resent(outbox):
+    ws = CommitThenFail()
+    ws.fail_after_write = 1
+    outbox.put_many(rows(0, 4))
+    drain(SheetSyncWorker(outbox, lambda: ws, batch_size=2))
+    assert ws.rows == rows(0, 4)
+
+
+def test_failed_append_with_duplicate_keys_is_resent(outbox):
+    same_time = [["2025-01-01 10:00:00", f"guest {i}"] for i in range(6)]
+    ws = FakeWorksheet()
+    outbox.put_many(same_time)
+    worker = SheetSyncWorker(outbox, lambda: ws, batch_size=3)
+    worker.flush_once()
+    ws.errors = [RuntimeError("429 rate limited")]  # fails without writing
+    drain(worker)
+    assert ws.rows == same_time
+    assert outbox.pending() == 0
+
+
+def test_crash_after_append_is_recovered(outbox):
+    outbox.put_many(rows(0, 3))
+    batch, end = outbox.peek(10)
+    outbox.mark_inflight(batch, end, 0)
+    ws = FakeWorksheet(batch)  # the append landed, then the process died
+    drain(SheetSyncWorker(outbox, lambda: ws))
+    assert ws.rows == rows(0, 3)
+
+
+def test_crash_before_append_is_resent(outbox):
+    outbox.put_many(rows(0, 3))
+    outbox.mark_inflight(*outbox.peek(10), 0)
+    ws = FakeWorksheet()
+    drain(SheetSyncWorker(outbox, lambda: ws))
+    assert ws.rows == rows(0, 3)
+
+
+def test_run_thread_recovers_and_stops(outbox):
+    ws = CommitThenFail()
+    ws.fail_after_write = 1
+    ws.errors = [ConnectionError("offline")]
+    outbox.put_many(rows(0, 6))
+    worker = SheetSyncWorker(outbox, lambda: ws, batch_size=2, base_delay=0.01,
+                             poll_interval=0.01)
+    worker.start()
+    worker.notify()
+    try:
+        for _ in range(500):
+            if outbox.pending() == 0 and worker.last_error is None:
+                break
+            worker._stopping.wait(0.01)
+    finally:
+        worker.stop()
+        worker.join(5)
+    assert ws.rows == rows(0, 6)
+    assert worker.failures == 0
@@ -0,0 +1,112 @@
+"""Energy-based voice-activity detection for form-field recordings.
+
+A guest answering "Age" usually stops talking after a second, so instead of
+always recording five seconds the mic stream is fed frame by frame into an
+`Endpointer`. It stops once speech has been followed by a short silence.
+The capture is then trimmed to the speech (plus a little padding) and
+resampled to 16 kHz, which is all the recognizers need.
+"""
+
+import numpy as np
+
+TARGET_RATE = 16000
+
+
+def frame_dbfs(frame):
+    """RMS level of an int16 frame in dB relative to full scale."""
+    x = frame.astype(np.float32).ravel()
+    rms = np.sqrt(np.mean(x * x)) if x.size else 0.0
+    return 20 * np.log10(max(rms, 1.0) / 32768.0)
+
+
+def resample(samples, src_rate, dst_rate=TARGET_RATE, taps=63):
+    """Band-limit with a windowed-sinc low-pass, then interpolate to `dst_rate`."""
+    x = samples.astype(np.float32).ravel()
+    if src_rate == dst_rate or x.size == 0:
+        return samples.astype(np.int16).reshape(-1, 1)
+    if dst_rate < src_rate:
+        cutoff = 0.5 * dst_rate / src_rate
+        n = np.arange(taps) - (taps - 1) / 2
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+        x = np.convolve(x, kernel / kernel.sum(), mode="same")
+    t = np.arange(int(len(x) * dst_rate / src_rate)) * (src_rate / dst_rate)
+    y = np.interp(t, np.arange(len(x)), x)
+    return np.clip(np.round(y), -32768, 32767).astype(np.int16).reshape(-1, 1)
+
+
+class Endpointer:
+    """Decides, frame by frame, when the speaker has finished.
+
+    The noise floor starts at the first frame (guests take a moment to start
+    talking), drops immediately to any quieter frame and creeps up by
+    `floor_rise_db` per frame otherwise. A frame counts as speech when it is
+    `threshold_db` above that floor and louder than `min_dbfs`. Recording
+    stops after `hangover_ms` of silence following at least `min_speech_ms`
+    of speech, or at `max_seconds`.
+    """
+
+    def __init__(self, samplerate, frame_ms=30, threshold_db=12.0, min_dbfs=-50.0,
+                 floor_rise_db=0.1, min_speech_ms=120, hangover_ms=600, pad_ms=150,
+                 max_seconds=5.0):
+        self.samplerate = samplerate
+        self.frame_len = int(samplerate * frame_ms / 1000)
+        self.threshold_db = threshold_db
+        self.min_dbfs = min_dbfs
+        self.floor_rise_db = floor_rise_db
+        self.min_speech = max(1, min_speech_ms // frame_ms)
+        self.hangover = max(1, hangover_ms // frame_ms)
+        self.pad = pad_ms // frame_ms
+        self.max_frames = int(max_seconds * 1000 / frame_ms)
+        self.frames = []
+        self.floor = None
+        self.first_speech = None
+        self.last_speech = None
+        self._speech_frames = 0
+        self._pending = np.zeros((0, 1), np.int16)
+        self.done = False
+
+    def _classify(self, frame):
+        level = frame_dbfs(frame)
+        if self.floor is None:
+            self.floor = level
+        elif level < self.floor:
+            self.floor = level
+        else:
+            self.floor += self.floor_rise_db
+        return level > max(self.floor + self.threshold_db, self.min_dbfs)
+
+    def feed(self, chunk):
+        """Add samples from the mic; returns True once recording can stop."""
+        if self.done:
+            return True
+        data = np.concatenate([self._pending, chunk.reshape(-1, 1)])
+        n = len(data) // self.frame_len
+        self._pending = data[n * self.frame_len:]
+        for i in range(n):
+            frame = data[i * self.frame_len:(i + 1) * self.frame_len]
+            idx = len(self.frames)
+            self.frames.append(frame)
+            if self._classify(frame):
+                self._speech_frames += 1
+                if self.first_speech is None:
+                    self.first_speech = idx
+                self.last_speech = idx
+            spoke = self._speech_frames >= self.min_speech
+            if (spoke and idx - self.last_speech >= self.hangover) or idx + 1 >= self.max_frames:
+                self.done = True
+                break
+        return self.done
+
+    def speech(self):
+        """The captured audio trimmed to the speech, with `pad_ms` either side."""
+        if not self.frames:
+            return np.zeros((0, 1), np.int16)
+        if self.first_speech is None:
+            return np.concatenate(self.frames)
+        lo = max(0, self.first_speech - self.pad)
+        hi = min(len(self.frames), self.last_speech + 1 + self.pad)
+        return np.concatenate(self.frames[lo:hi])
+
+    @property
+    def seconds(self):
+        return len(self.frames) * self.frame_len / self.samplerate
@@ -0,0 +1,117 @@
+"""Background voice capture and transcription for the registration form.
+
+`record_audio` used to block the whole Streamlit script for the recording,
+a WAV round trip through `output.wav` and the recognition call. Here the
+microphone is read straight into memory on a dedicated thread, and the
+audio goes to a recognizer pool as `sr.AudioData`. The caller only gets a
+`Future`. Recordings are serialized (there is one microphone), but field B
+can be recorded while field A is still being transcribed.
+"""
+
+import concurrent.futures
+import os
+import threading
+
+import numpy as np
+import sounddevice as sd
+import speech_recognition as sr
+import wavio
+
+from perf import span
+from recognizers import GoogleRecognizer
+from vad import TARGET_RATE, Endpointer, resample
+
+
+def wav_name(session_id, field):
+    """Per-session recording name, e.g. `3f2a9c1e-mobile-number.wav`."""
+    return f"{session_id}-{field.lower().replace(' ', '-')}.wav"
+
+
+class VoicePipeline:
+    """Mic thread + recognizer pool, shared by every session of the app.
+
+    `recognize` is a backend from `recognizers` (any callable mapping
+    `sr.AudioData` to text and raising `sr.UnknownValueError` /
+    `sr.RequestError` will do). With `endpointing` on, a recording stops
+    as soon as the guest has finished speaking (`duration` becomes the upper
+    bound), is trimmed to the speech and resampled to 16 kHz. If `wav_dir`
+    is set, every capture is also kept there under its per-session
+    `wav_name`.
+    """
+
+    def __init__(self, recognize=None, max_workers=4, samplerate=44100,
+                 duration=5, endpointing=True, wav_dir=None):
+        self.recognize = recognize or GoogleRecognizer()
+        self.samplerate = samplerate
+        self.duration = duration
+        self.endpointing = endpointing
+        self.wav_dir = wav_dir
+        self._mic = concurrent.futures.ThreadPoolExecutor(1, "mic")
+        self._asr = concurrent.futures.ThreadPoolExecutor(max_workers, "asr")
+
+    # ── stages ──────────────────────────────────────────────────────────────
+
+    def capture(self):
+        """Record mono int16 into memory; returns `(samples, samplerate)`."""
+        with span("voice.capture", endpointing=self.endpointing) as fields:
+            samples, samplerate = (self._capture_until_silence() if self.endpointing
+                                   else self._capture_fixed())
+            fields["seconds"] = round(len(samples) / samplerate, 2)
+        return samples, samplerate
+
+    def _capture_fixed(self):
+        chunks = []
+        with sd.InputStream(samplerate=self.samplerate, channels=1, dtype="int16",
+                            callback=lambda indata, *_: chunks.append(indata.copy())):
+            sd.sleep(int(self.duration * 1000))
+        samples = np.concatenate(chunks) if chunks else np.zeros((0, 1), np.int16)
+        return samples, self.samplerate
+
+    def _capture_until_silence(self):
+        ep = Endpointer(self.samplerate, max_seconds=self.duration)
+        finished = threading.Event()
+
+        def _callback(indata, *_):
+            if ep.feed(indata.copy()):
+                finished.set()
+
+        with sd.InputStream(samplerate=self.samplerate, channels=1, dtype="int16",
+                            blocksize=ep.frame_len, callback=_callback):
+            finished.wait(self.duration + 1)
+        return resample(ep.speech(), self.samplerate, TARGET_RATE), TARGET_RATE
+
+    def transcribe(self, samples, samplerate, recognize=None):
+        recognize = recognize or self.recognize
+        audio = sr.AudioData(samples.tobytes(), samplerate, 2)
+        with span("voice.recognize", backend=getattr(recognize, "name", "custom")):
+            return recognize(audio)
+
+    # ── public API ──────────────────────────────────────────────────────────
+
+    def submit(self, field, session_id="local", recognize=None):
+        """Queue a recording for `field`; the future resolves to the text.
+
+        `recognize` overrides the pipeline's backend for this capture only.
+        """
+        result = concurrent.futures.Future()
+
+        def _captured(fut):
+            try:
+                samples, samplerate = fut.result()
+                if self.wav_dir:
+                    os.makedirs(self.wav_dir, exist_ok=True)
+                    wavio.write(os.path.join(self.wav_dir, wav_name(session_id, field)),
+                                samples, samplerate, sampwidth=2)
+            except Exception as e:
+                result.set_exception(e)
+                return
+            self._asr.submit(self.transcribe, samples, samplerate, recognize).add_done_callback(_recognized)
+
+        def _recognized(fut):
+            if fut.exception() is not None:
+                result.set_exception(fut.exception())
+            else:
+                result.set_result(fut.result())
+
+        self._mic.submit(self.capture).add_done_callback(_captured)
+        return result